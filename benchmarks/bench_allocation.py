@@ -0,0 +1,36 @@
+"""Creation and destruction of small objects.
+
+Objects are created with the constructor and returned by value from a method.
+A freelist keeps deallocated Python objects for reuse and value types store
+the C++ object in the Python object, so that no memory is allocated.
+"""
+from pywrap.defaultconfig import Config
+from common import extension_from, measure
+
+
+NUMBER = 200000
+
+
+def configs():
+    yield "default", Config()
+    config = Config()
+    config.set_freelist("Vector3", 64)
+    yield "freelist", config
+    config = Config()
+    config.set_freelist("Vector3", 64)
+    config.value_type("Vector3")
+    yield "freelist, value type", config
+
+
+if __name__ == "__main__":
+    print("configuration           Vector3(...) [us]    a.plus(b) [us]")
+    for i, (name, config) in enumerate(configs()):
+        modulename = "valuetypes%d" % i
+        with extension_from("valuetypes.hpp", modulename, config):
+            Vector3 = __import__(modulename).Vector3
+            a = Vector3(1.0, 2.0, 3.0)
+            b = Vector3(4.0, 5.0, 6.0)
+            print("%-20s    %17.3f    %14.3f" % (
+                name,
+                measure("Vector3(1.0, 2.0, 3.0)", NUMBER, Vector3=Vector3),
+                measure("a.plus(b)", NUMBER, a=a, b=b)))
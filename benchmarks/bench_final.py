@@ -0,0 +1,46 @@
+"""Calls of methods of final classes and inline methods.
+
+Methods of classes that are not final are looked up in the vtable and
+cpdef methods check for overrides in Python subclasses when they are called
+from Cython. Final classes with inline methods are called directly and can
+be inlined by the C++ compiler. Calls from Python are shown for comparison.
+"""
+from pywrap.defaultconfig import Config
+from common import extension_from, measure
+
+
+NUMBER = 1000000
+LOOP = """
+def loop(Counter c, int n):
+    cdef int i
+    for i in range(n):
+        c.%s()
+"""
+
+
+def configurations():
+    config = Config()
+    yield "cpdef", config, "increment"
+
+    config = Config()
+    config.final_class("Counter")
+    yield "final, cpdef", config, "increment"
+
+    config = Config()
+    config.final_class("Counter")
+    config.inline_method("Counter", "increment")
+    yield "final, inline", config, "_increment_impl"
+
+
+if __name__ == "__main__":
+    print("configuration   Cython [ns]   Python [us]")
+    for i, (name, config, method) in enumerate(configurations()):
+        modulename = "final%d" % i
+        with extension_from("noexcept.hpp", modulename, config,
+                            LOOP % method):
+            module = __import__(modulename)
+            c = module.Counter()
+            cython_time = measure("loop(c, n)", 10, loop=module.loop, c=c,
+                                  n=NUMBER) / NUMBER * 1000.0
+            python_time = measure("c.increment()", NUMBER, c=c)
+            print("%-14s  %11.3f   %11.3f" % (name, cython_time, python_time))
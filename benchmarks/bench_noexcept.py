@@ -0,0 +1,19 @@
+"""Call overhead of trivial accessors with and without exception translation.
+
+Methods that are declared noexcept are called without a C++ try/catch
+block and without checking for a pending Python exception.
+"""
+from common import extension_from, measure
+
+
+NUMBER = 1000000
+
+
+if __name__ == "__main__":
+    with extension_from("noexcept.hpp"):
+        from noexcept import Counter
+        c = Counter()
+        print("operation                 time [us]")
+        for stmt in ["c.get()", "c.get_noexcept()", "c.increment()",
+                     "c.increment_noexcept()"]:
+            print("%-24s  %9.3f" % (stmt, measure(stmt, NUMBER, c=c)))
@@ -0,0 +1,41 @@
+"""Throughput of a long-running C++ function called from several threads."""
+import threading
+import time
+from common import extension_from
+from pywrap.defaultconfig import Config
+from pywrap.testing import full_paths
+
+
+N_CALLS = 64
+N_ITERATIONS = 200000
+
+
+def throughput(fun, n_threads):
+    calls_per_thread = N_CALLS // n_threads
+
+    def work():
+        for _ in range(calls_per_thread):
+            fun(N_ITERATIONS)
+
+    threads = [threading.Thread(target=work) for _ in range(n_threads)]
+    start = time.time()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return calls_per_thread * n_threads / (time.time() - start)
+
+
+if __name__ == "__main__":
+    config = Config()
+    config.release_gil_in_function("sumOfSines")
+    header = full_paths("nogil.hpp")[0]
+    with extension_from(header, "gil_held"), \
+            extension_from(header, "gil_released", config):
+        import gil_held
+        import gil_released
+        print("threads    GIL held [calls/s]    GIL released [calls/s]")
+        for n_threads in [1, 2, 4, 8]:
+            print("%7d    %20.1f    %22.1f"
+                  % (n_threads, throughput(gil_held.sum_of_sines, n_threads),
+                     throughput(gil_released.sum_of_sines, n_threads)))
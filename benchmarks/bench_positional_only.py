@@ -0,0 +1,31 @@
+"""Python call overhead per number of arguments.
+
+cpdef functions parse keyword arguments on every call. Functions with
+positional-only arguments are def functions that Cython can call with
+the vectorcall protocol and that do not have to match keywords.
+"""
+from pywrap.defaultconfig import Config
+from common import extension_from, measure
+
+
+NUMBER = 1000000
+MAX_ARGS = 4
+
+
+def call(n_args):
+    return "args%d(%s)" % (n_args, ", ".join(["1"] * n_args))
+
+
+if __name__ == "__main__":
+    times = []
+    for i, positional_only in enumerate([False, True]):
+        config = Config()
+        config.positional_only_arguments = positional_only
+        modulename = "callargs%d" % i
+        with extension_from("callargs.hpp", modulename, config):
+            module = __import__(modulename)
+            times.append([measure(call(n), NUMBER, **vars(module))
+                          for n in range(MAX_ARGS + 1)])
+    print("arguments   cpdef [us]   positional-only [us]")
+    for n in range(MAX_ARGS + 1):
+        print("%9d   %10.3f   %20.3f" % (n, times[0][n], times[1][n]))
@@ -0,0 +1,21 @@
+"""Return small objects by value.
+
+The Python object of the result is created without calling __init__ and the
+result is moved to the heap, so that it does not need a default constructor.
+Calling the constructor from Python is shown for comparison.
+"""
+from common import extension_from, measure
+
+
+NUMBER = 100000
+
+
+if __name__ == "__main__":
+    with extension_from("valuereturn.hpp"):
+        from valuereturn import Point, make_point
+        p = Point(1.0, 2.0)
+        print("operation                 time [us]")
+        for stmt in ["Point(1.0, 2.0)", "make_point(1.0, 2.0)",
+                     "p.translated(1.0, 2.0)"]:
+            print("%-24s  %9.3f" % (stmt, measure(
+                stmt, NUMBER, Point=Point, make_point=make_point, p=p)))
@@ -0,0 +1,28 @@
+"""Conversion of Python objects to std::vector<double>.
+
+Lists and non-contiguous arrays are converted element by element, contiguous
+arrays of type float64 are copied from their buffer.
+"""
+import numpy as np
+from common import extension_from, measure
+
+
+SIZES = [10, 1000, 1000000]
+
+
+if __name__ == "__main__":
+    with extension_from("vectorinput.hpp"):
+        from vectorinput import first
+        print("size       list [us]    strided array [us]    "
+              "contiguous array [us]")
+        for size in SIZES:
+            values = np.random.rand(2 * size)
+            contiguous = values[:size].copy()
+            strided = values[::2]
+            number = max(1, 100000 // size)
+            print("%7d    %9.1f    %18.1f    %21.1f" % (
+                size,
+                measure("first(a)", number, first=first,
+                        a=contiguous.tolist()),
+                measure("first(a)", number, first=first, a=strided),
+                measure("first(a)", number, first=first, a=contiguous)))
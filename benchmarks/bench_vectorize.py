@@ -0,0 +1,30 @@
+"""Scalar wrappers called in a Python loop vs. vectorized companions."""
+import numpy as np
+from common import extension_from, measure
+from pywrap.defaultconfig import Config
+
+
+SIZES = [10, 1000, 100000]
+
+
+if __name__ == "__main__":
+    config = Config()
+    config.vectorize_function("hypotenuse")
+    config.vectorize_method("Polynomial", "evaluate")
+    with extension_from("vectorize.hpp", config=config):
+        from vectorize import hypotenuse, hypotenuse_vec, Polynomial
+        p = Polynomial(1.0, 2.0, 3.0)
+        print("size      loop [us]    ufunc [us]    loop method [us]    "
+              "method_vec [us]")
+        for size in SIZES:
+            a = np.random.rand(size)
+            b = np.random.rand(size)
+            number = max(1, 100000 // size)
+            print("%6d    %9.1f    %10.1f    %16.1f    %15.1f" % (
+                size,
+                measure("[hypotenuse(x, y) for x, y in zip(a, b)]", number,
+                        hypotenuse=hypotenuse, a=a, b=b),
+                measure("hypotenuse_vec(a, b)", number,
+                        hypotenuse_vec=hypotenuse_vec, a=a, b=b),
+                measure("[p.evaluate(x) for x in a]", number, p=p, a=a),
+                measure("p.evaluate_vec(a)", number, p=p, a=a)))
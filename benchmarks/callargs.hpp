@@ -0,0 +1,24 @@
+int args0()
+{
+    return 0;
+}
+
+int args1(int a)
+{
+    return a;
+}
+
+int args2(int a, int b)
+{
+    return a + b;
+}
+
+int args3(int a, int b, int c)
+{
+    return a + b + c;
+}
+
+int args4(int a, int b, int c, int d)
+{
+    return a + b + c + d;
+}
@@ -0,0 +1,58 @@
+import os
+import sys
+import shutil
+import tempfile
+import timeit
+from contextlib import contextmanager
+from pywrap.cython import make_cython_wrapper, write_files, run_setup
+from pywrap.defaultconfig import Config
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+@contextmanager
+def extension_from(header, modulename=None, config=None, cython_code=None):
+    """Build an optimized extension in a temporary directory.
+
+    Parameters
+    ----------
+    header : str
+        Name of a header in the benchmark directory or absolute path
+
+    modulename : str, optional (default: name of the header)
+        Name of the module
+
+    config : Config, optional (default: Config())
+        Configuration
+
+    cython_code : str, optional (default: None)
+        Code that will be appended to the extension, e.g., loops that call
+        the wrapper from Cython
+    """
+    if config is None:
+        config = Config()
+    builddir = tempfile.mkdtemp()
+    try:
+        files = make_cython_wrapper(
+            os.path.join(BENCHMARK_DIR, header), [], modulename,
+            target=builddir, config=config)
+        if cython_code is not None:
+            for filename in files:
+                if filename.endswith("." + config.pyx_file_ending):
+                    files[filename] += os.linesep + cython_code
+        write_files(files, builddir)
+        run_setup("setup.py", target=builddir)
+        sys.path.insert(0, builddir)
+        try:
+            yield
+        finally:
+            sys.path.remove(builddir)
+    finally:
+        shutil.rmtree(builddir)
+
+
+def measure(stmt, number, repeat=5, **namespace):
+    """Measure the best time per execution of a statement in microseconds."""
+    times = timeit.repeat(stmt, number=number, repeat=repeat,
+                          globals=namespace)
+    return min(times) / number * 1e6
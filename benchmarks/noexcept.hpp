@@ -0,0 +1,26 @@
+class Counter
+{
+    int count;
+public:
+    Counter() : count(0) {}
+
+    int get() const
+    {
+        return count;
+    }
+
+    int getNoexcept() const noexcept
+    {
+        return count;
+    }
+
+    void increment()
+    {
+        count++;
+    }
+
+    void incrementNoexcept() noexcept
+    {
+        count++;
+    }
+};
@@ -0,0 +1,22 @@
+class Point
+{
+    double x, y;
+public:
+    Point(double x, double y) : x(x), y(y) {}
+
+    double getX() const
+    {
+        return x;
+    }
+
+    Point translated(double dx, double dy) const
+    {
+        return Point(x + dx, y + dy);
+    }
+};
+
+
+Point makePoint(double x, double y)
+{
+    return Point(x, y);
+}
@@ -0,0 +1,20 @@
+#include <cmath>
+
+
+class Vector3
+{
+    double x, y, z;
+public:
+    Vector3() : x(0.0), y(0.0), z(0.0) {}
+    Vector3(double x, double y, double z) : x(x), y(y), z(z) {}
+
+    Vector3 plus(const Vector3& other) const
+    {
+        return Vector3(x + other.x, y + other.y, z + other.z);
+    }
+
+    double norm() const
+    {
+        return std::sqrt(x * x + y * y + z * z);
+    }
+};
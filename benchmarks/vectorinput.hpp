@@ -0,0 +1,7 @@
+#include <vector>
+
+
+double first(const std::vector<double>& values)
+{
+    return values.empty() ? 0.0 : values[0];
+}
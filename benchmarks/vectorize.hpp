@@ -0,0 +1,19 @@
+#include <cmath>
+
+
+double hypotenuse(double a, double b)
+{
+    return std::sqrt(a * a + b * b);
+}
+
+class Polynomial
+{
+    double a, b, c;
+public:
+    Polynomial(double a, double b, double c) : a(a), b(b), c(c) {}
+
+    double evaluate(double x)
+    {
+        return (a * x + b) * x + c;
+    }
+};
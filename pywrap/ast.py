@@ -63,6 +63,8 @@ class Clazz(AstNode):
         self.name = name
         self.comment = comment
         self.base = None
+        self.iterator_methods = []
+        self.iterator_value_type = None
 
     def __str__(self):
         result = "%s '%s' ('%s')" % (
@@ -80,6 +82,11 @@ class Clazz(AstNode):
     def get_cppname(self):
         return self.name
 
+    def is_iterable(self):
+        """Does the class have the methods begin() and end()?"""
+        return ("begin" in self.iterator_methods and
+                "end" in self.iterator_methods)
+
     def get_attached_typeinfo(self):
         return {}
 
@@ -110,6 +117,7 @@ class FunctionBase(AstNode):
         super(FunctionBase, self).__init__()
         self.name = name
         self.comment = comment
+        self.noexcept = False
 
     def __str__(self):
         result = "%s '%s'" % (self.__class__.__name__, self.name)
@@ -145,6 +153,8 @@ class Method(FunctionBase):
         super(Method, self).__init__(name, comment)
         self.result_type = result_type
         self.class_name = class_name
+        self.returns_reference = False
+        self.returns_const_reference = False
 
     def __str__(self):
         result = super(Method, self).__str__()
@@ -197,10 +207,11 @@ class TemplateMethod(Method, Template):
 
 
 class Param(AstNode):
-    def __init__(self, name, tipe):
+    def __init__(self, name, tipe, const=False):
         super(Param, self).__init__()
         self.name = name
         self.tipe = tipe
+        self.const = const
         self.default_value = None
 
     def __str__(self):
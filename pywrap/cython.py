@@ -1,5 +1,6 @@
 import os
 import sys
+import subprocess
 from .defaultconfig import Config
 from .exporter import CythonDeclarationExporter, CythonImplementationExporter
 from .parser import Parser, Includes, TypeInfo
@@ -96,8 +97,8 @@ def make_cython_wrapper(filenames, sources, modulename=None, target=".",
     postprocess_asts(asts)
 
     results = dict(
-        [_make_extension(modulename, asts, includes, type_info, config),
-         _make_declarations(asts, includes, config),
+        _make_extension(modulename, asts, includes, type_info, config) +
+        [_make_declarations(asts, includes, type_info, config),
          _make_setup(sources, modulename, target, incdirs, compiler_flags,
                      config)]
     )
@@ -131,12 +132,22 @@ def _make_extension(modulename, asts, includes, type_info, config):
         ast.accept(cie)
     pyx_filename = modulename + "." + config.pyx_file_ending
     body = cie.export()
+    if modulename in includes.imports:
+        raise ValueError("The module name '%s' would shadow the Python module "
+                         "'%s' that the wrapper imports. Please give another "
+                         "module name." % (modulename, modulename))
     extension = includes.implementations_import() + body
-    return pyx_filename, extension
+    files = [(pyx_filename, extension)]
+    if config.cimportable:
+        pxd_filename = modulename + "." + config.pxd_file_ending
+        declarations = (includes.wrapper_declarations_import() +
+                        cie.export_declarations())
+        files.append((pxd_filename, declarations))
+    return files
 
 
-def _make_declarations(asts, includes, config):
-    cde = CythonDeclarationExporter(includes, config)
+def _make_declarations(asts, includes, type_info, config):
+    cde = CythonDeclarationExporter(includes, config, type_info)
     for ast in asts:
         ast.accept(cde)
     body = cde.export()
@@ -175,7 +186,7 @@ def write_files(files, target="."):
             f.write(content)
 
 
-def run_setup(setuppy_name="setup.py", hide_errors=False):
+def run_setup(setuppy_name="setup.py", hide_errors=False, target="."):
     """Run setup script to build extension.
 
     Parameters
@@ -185,11 +196,20 @@ def run_setup(setuppy_name="setup.py", hide_errors=False):
 
     hide_errors : bool, optional (default: False)
         Hide output to stderr
+
+    target : str, optional (default: '.')
+        Directory that contains the setup script, the extension will be
+        built in this directory
+
+    Returns
+    -------
+    status : int
+        Exit status of the setup script
     """
-    cmd = "python %s build_ext --inplace" % setuppy_name
+    cmd = [sys.executable, setuppy_name, "build_ext", "--inplace"]
     with hidden_stdout():
         if hide_errors:
             with hidden_stderr():
-                os.system(cmd)
+                return subprocess.call(cmd, cwd=target)
         else:
-            os.system(cmd)
+            return subprocess.call(cmd, cwd=target)
@@ -56,6 +56,74 @@ class Config(object):
         self.registered_template_specializations = {}
         self.additional_declerations = []
         self.ignored = []
+        self.nogil = []
+        # functions and methods that do not throw although they are not
+        # declared with noexcept or throw(), C++ exceptions will not be
+        # translated for them
+        self.noexcept = []
+        self.vectorized = []
+
+        # A pointer to numeric data followed by a parameter of one of these
+        # types is converted from a single buffer. If array_length_names is
+        # not empty, the name of the second parameter must be one of them.
+        self.array_length_types = [
+            "int", "unsigned int", "long", "unsigned long", "long long",
+            "unsigned long long", "size_t"]
+        self.array_length_names = []
+        self.matrix_arguments = {}
+        self.warn_on_matrix_copy = False
+
+        # return std::vector of numbers as NumPy arrays without copying
+        self.vectors_as_arrays = False
+        self.vector_as_array_functions = []
+
+        # return std::map and std::set as read-only views, not dict and set
+        self.containers_as_views = False
+        self.container_view_functions = []
+
+        # return references to wrapped objects from methods and nested
+        # objects from fields as views into the parent object, not copies
+        self.references_as_views = False
+        self.reference_view_members = []
+
+        # conversion of std::string and char *: 'bytes' uses Cython's
+        # automatic conversion, 'utf-8' accepts and returns str and 'buffer'
+        # accepts any buffer and returns std::string as read-only buffer
+        self.string_policy = "bytes"
+        self.string_policies = {}
+
+        # return fixed size arrays and std::array as NumPy arrays, not tuples
+        self.fixed_size_arrays_as_ndarrays = False
+
+        # classes that export contiguous memory with the buffer protocol
+        self.buffers = {}
+        # element types of the iterators that begin() and end() return, the
+        # types of pointers and iterators of STL containers will be detected
+        self.iterators = {}
+
+        # number of Python objects per class that are kept for reuse
+        self.freelists = {}
+        # classes whose C++ object is stored in the Python object, they
+        # need a default constructor and an assignment operator
+        self.value_types = []
+        # final classes cannot be subclassed, so Cython calls their methods
+        # without looking for overrides in Python subclasses
+        self.classes_final = False
+        self.final_classes = []
+        # inline methods are a def function that calls a cdef inline
+        # implementation, which can be called directly from Cython
+        self.methods_inline = False
+        self.inline_methods = []
+        # arguments of these functions and methods can only be passed by
+        # position, so Python calls skip the parsing of keyword arguments,
+        # they are def functions because cpdef cannot have positional-only
+        # arguments
+        self.positional_only_arguments = False
+        self.positional_only_functions = []
+        # generate '<module>.pxd', which declares the wrapper classes and the
+        # cpdef functions and methods, so that other Cython modules can
+        # cimport them
+        self.cimportable = False
 
         self.library_dirs = []
         self.libraries = []
@@ -114,6 +182,150 @@ class Config(object):
     def is_abstract_class(self, class_name):
         return self.is_ignored(class_name, "__init__")
 
+    def set_freelist(self, class_name, size):
+        self.freelists[class_name] = size
+
+    def freelist(self, class_name):
+        return self.freelists.get(class_name)
+
+    def value_type(self, class_name):
+        self.value_types.append(class_name)
+
+    def is_value_type(self, class_name):
+        return class_name in self.value_types
+
+    def final_class(self, class_name):
+        self.final_classes.append(class_name)
+
+    def is_final_class(self, class_name):
+        return self.classes_final or class_name in self.final_classes
+
+    def inline_method(self, class_name, method_name):
+        self.inline_methods.append(class_name + "::" + method_name)
+
+    def is_method_inline(self, class_name, method_name):
+        return (self.methods_inline or
+                class_name + "::" + method_name in self.inline_methods)
+
+    def positional_only(self, function_name):
+        self.positional_only_functions.append(function_name)
+
+    def has_positional_only_arguments(self, function_name):
+        return (self.positional_only_arguments or
+                function_name in self.positional_only_functions)
+
+    def release_gil_in_function(self, function_name):
+        self.nogil.append(function_name)
+
+    def is_gil_released_in_function(self, function_name):
+        return function_name in self.nogil
+
+    def release_gil_in_method(self, class_name, method_name):
+        self.nogil.append(class_name + "::" + method_name)
+
+    def is_gil_released_in_method(self, class_name, method_name):
+        return (self.is_gil_released_in_class(class_name) or
+                class_name + "::" + method_name in self.nogil)
+
+    def release_gil_in_class(self, class_name):
+        self.nogil.append(class_name + "::*")
+
+    def is_gil_released_in_class(self, class_name):
+        return class_name + "::*" in self.nogil
+
+    def declare_noexcept_function(self, function_name):
+        self.noexcept.append(function_name)
+
+    def is_noexcept_function(self, function_name):
+        return function_name in self.noexcept
+
+    def declare_noexcept_method(self, class_name, method_name):
+        self.noexcept.append(class_name + "::" + method_name)
+
+    def is_noexcept_method(self, class_name, method_name):
+        return class_name + "::" + method_name in self.noexcept
+
+    def vectorize_function(self, function_name):
+        self.vectorized.append(function_name)
+
+    def is_function_vectorized(self, function_name):
+        return function_name in self.vectorized
+
+    def vectorize_method(self, class_name, method_name):
+        self.vectorized.append(class_name + "::" + method_name)
+
+    def is_method_vectorized(self, class_name, method_name):
+        return class_name + "::" + method_name in self.vectorized
+
+    def add_array_length_name(self, name):
+        self.array_length_names.append(name)
+
+    def is_array_length_name(self, name):
+        return (len(self.array_length_names) == 0 or
+                name in self.array_length_names)
+
+    def register_matrix_argument(self, function_name, data_name, order="C",
+                                 leading_dimension=False):
+        if order not in ["C", "F"]:
+            raise ValueError("Unknown matrix order '%s', expected 'C' or 'F'."
+                             % order)
+        self.matrix_arguments[function_name + ":" + data_name] = (
+            order, leading_dimension)
+
+    def matrix_argument(self, function_name, data_name):
+        return self.matrix_arguments.get(function_name + ":" + data_name)
+
+    def return_vector_as_array(self, function_name):
+        self.vector_as_array_functions.append(function_name)
+
+    def is_vector_returned_as_array(self, function_name):
+        return (self.vectors_as_arrays or
+                function_name in self.vector_as_array_functions)
+
+    def return_container_as_view(self, function_name):
+        self.container_view_functions.append(function_name)
+
+    def is_container_returned_as_view(self, function_name):
+        return (self.containers_as_views or
+                function_name in self.container_view_functions)
+
+    def return_reference_as_view(self, class_name, member_name):
+        self.reference_view_members.append(class_name + "::" + member_name)
+
+    def is_reference_returned_as_view(self, class_name, member_name):
+        return (self.references_as_views or
+                class_name + "::" + member_name in
+                self.reference_view_members)
+
+    def set_string_policy(self, function_name, policy):
+        if policy not in ["bytes", "utf-8", "buffer"]:
+            raise ValueError("Unknown string policy '%s', expected 'bytes', "
+                             "'utf-8' or 'buffer'." % policy)
+        self.string_policies[function_name] = policy
+
+    def string_policy_of(self, function_name):
+        return self.string_policies.get(function_name, self.string_policy)
+
+    def register_buffer(self, class_name, data, shape, element_type,
+                        order="C", readonly=False):
+        if order not in ["C", "F"]:
+            raise ValueError("Unknown buffer order '%s', expected 'C' or 'F'."
+                             % order)
+        if isinstance(shape, str):
+            shape = [shape]
+        self.buffers[class_name] = {
+            "data": data, "shape": list(shape), "element_type": element_type,
+            "order": order, "readonly": readonly}
+
+    def buffer(self, class_name):
+        return self.buffers.get(class_name)
+
+    def register_iterator(self, class_name, value_type):
+        self.iterators[class_name] = value_type
+
+    def iterator_value_type(self, class_name):
+        return self.iterators.get(class_name)
+
     def add_library_dir(self, library_dir):
         self.library_dirs.append(library_dir)
 
@@ -1,3 +1,4 @@
+import os
 import warnings
 from functools import partial
 from itertools import chain
@@ -10,7 +11,9 @@ from .defaultconfig import Config
 from .template_specialization import (ClassSpecializer, FunctionSpecializer,
                                       MethodSpecializer)
 from .templates import render
-from .type_conversion import create_type_converter
+from .type_conversion import (create_type_converter,
+                              ReferenceViewTypeConverter, BUFFER_FORMATS,
+                              NUMPY_TYPES)
 from .utils import from_camel_case, replace_keyword_argnames
 
 
@@ -179,11 +182,16 @@ class CythonDeclarationExporter(AstExporter):
 
     config : Config, optional
         Configuration that controls e.g. template specializations
+
+    type_info : TypeInfo, optional
+        Contains names of custom C++ types that have been defined in the code
     """
-    def __init__(self, includes=Includes(), config=Config()):
+    def __init__(self, includes=Includes(), config=Config(),
+                 type_info=TypeInfo()):
         super(CythonDeclarationExporter, self).__init__()
         self.includes = includes
         self.config = config
+        self.type_info = type_info
 
     def visit_ast(self, ast):
         self.output = render("declarations", typedefs=self.typedefs,
@@ -213,8 +221,12 @@ class CythonDeclarationExporter(AstExporter):
             class_decl["fields"] = self.fields
             class_decl["ctors"] = self.ctors
             class_decl["methods"] = self.methods
+            if clazz.is_iterable():
+                class_decl["iterator"] = "%s_iterator" % clazz.name
+                class_decl["fullname"] = clazz.fullname()
             class_decl["empty_body"] = (len(self.fields) + len(self.methods) +
-                                        len(self.ctors) == 0)
+                                        len(self.ctors) == 0 and
+                                        not clazz.is_iterable())
 
             self.classes.append(render("class_decl", **class_decl))
         self._clear_class()
@@ -228,6 +240,8 @@ class CythonDeclarationExporter(AstExporter):
             const_dict = {"args": ", ".join(self.arguments)}
             const_dict.update(ctor.__dict__)
             const_str = templates.constructor_decl % const_dict
+            const_str += self._nogil_suffix(
+                self.config.is_gil_released_in_class(ctor.class_name))
             self.ctors.append(const_str)
         self.arguments = []
 
@@ -247,8 +261,26 @@ class CythonDeclarationExporter(AstExporter):
                 method_dict.update(additional_args)
             method_dict["name"] = replace_operator_decl(
                 method_dict["name"], self.config)
+            buf = self.config.buffer(method.class_name)
+            if (buf is not None and buf["readonly"] and
+                    method.name == buf["data"]):
+                # const has been removed from the type
+                method_dict["result_type"] = "const " + method.result_type
+            if is_method_reference_view(
+                    method, method.name, self.type_info, self.config):
+                method_dict["result_type"] += "&"
+            else:
+                method_dict["result_type"] = self._result_type_decl(
+                    method_dict["result_type"])
             method_str = template % method_dict
-            method_str += self._exception_suffix(method.result_type)
+            method_str += self._exception_suffix(
+                method.result_type, method.noexcept or
+                self.config.is_noexcept_method(method.class_name, method.name))
+            method_str += self._nogil_suffix(
+                self.config.is_gil_released_in_method(
+                    method.class_name, method.name) or
+                self.config.is_method_vectorized(
+                    method.class_name, method.name))
             self.methods.append(method_str)
         self.arguments = []
 
@@ -256,8 +288,15 @@ class CythonDeclarationExporter(AstExporter):
         if not function.ignored:
             function_dict = {"args": ", ".join(self.arguments)}
             function_dict.update(function.__dict__)
+            function_dict["result_type"] = self._result_type_decl(
+                function.result_type)
             function_str = templates.function_decl % function_dict
-            function_str += self._exception_suffix(function.result_type)
+            function_str += self._exception_suffix(
+                function.result_type, function.noexcept or
+                self.config.is_noexcept_function(function.name))
+            function_str += self._nogil_suffix(
+                self.config.is_gil_released_in_function(function.name) or
+                self.config.is_function_vectorized(function.name))
             self.functions.append(function_str)
         self.arguments = []
 
@@ -267,9 +306,16 @@ class CythonDeclarationExporter(AstExporter):
                 "args": ", ".join(self.arguments),
                 "types": ", ".join(template_function.template_types)}
             function_dict.update(template_function.__dict__)
+            function_dict["result_type"] = self._result_type_decl(
+                template_function.result_type)
             function_str = templates.template_function_decl % function_dict
             function_str += self._exception_suffix(
-                template_function.result_type)
+                template_function.result_type, template_function.noexcept or
+                self.config.is_noexcept_function(template_function.name))
+            function_str += self._nogil_suffix(
+                self.config.is_gil_released_in_function(
+                    template_function.name) or
+                self.config.is_function_vectorized(template_function.name))
             self.functions.append(function_str)
         self.arguments = []
 
@@ -278,9 +324,27 @@ class CythonDeclarationExporter(AstExporter):
         param_dict["name"] = replace_keyword_argnames(param.name)
         self.arguments.append(templates.arg_decl % param_dict)
 
-    def _exception_suffix(self, result_type):
-        """Workaround for bug in Cython when returning C arrays."""
-        if result_type == "char *":
+    def _result_type_decl(self, result_type):
+        """Objects that are returned by value will be moved to the heap."""
+        tname = self.type_info.underlying_type(result_type)
+        if (tname in self.type_info.classes and
+                not self.config.is_value_type(tname)):
+            self.includes.add_include_for_result()
+            return "_Result[%s]" % result_type
+        return result_type
+
+    def _nogil_suffix(self, nogil):
+        if nogil:
+            return " nogil"
+        else:
+            return ""
+
+    def _exception_suffix(self, result_type, noexcept=False):
+        """Translate C++ exceptions unless the function cannot throw.
+
+        Functions that return C arrays are a workaround for a bug in Cython.
+        """
+        if noexcept or result_type == "char *":
             return ""
         else:
             return " except +"
@@ -293,6 +357,35 @@ def replace_operator_decl(method_name, config):
         return method_name
 
 
+def is_reference_view(class_name, member_name, tname, type_info, config):
+    """Is a member of a class returned as view into the parent object?"""
+    return (tname in type_info.view_classes and
+            type_info.underlying_type(tname) in type_info.classes and
+            config.is_reference_returned_as_view(class_name, member_name))
+
+
+def is_method_reference_view(method, member_name, type_info, config):
+    """Is the reference returned by a method a view into the parent object?
+
+    References to const objects are always copied because a view would
+    allow to modify the parent object.
+    """
+    return (method.returns_reference and
+            not method.returns_const_reference and
+            is_reference_view(method.class_name, member_name,
+                              method.result_type, type_info, config))
+
+
+def _add_iteration_note(comment):
+    """Warn in the docstring that the C++ iterators may be invalidated."""
+    note = ("Iteration walks the C++ range from begin() to end(). Modifying "
+            "the object" + os.linesep + "while iterating over it is undefined "
+            "behaviour.")
+    if comment:
+        return comment + os.linesep + os.linesep + note
+    return note
+
+
 class CythonImplementationExporter(AstExporter):
     """Export to Cython implementation file (.pyx).
 
@@ -313,12 +406,36 @@ class CythonImplementationExporter(AstExporter):
         self.includes = includes
         self.type_info = type_info
         self.config = config
+        self.function_declarations = []
+        self.class_names = []
+        self.class_declarations = []
+        self.declarations_output = None
+
+    def _clear_class(self):
+        super(CythonImplementationExporter, self)._clear_class()
+        self.method_declarations = []
+
+    def export_declarations(self):
+        """Export declarations of the wrapper classes and functions.
+
+        Returns
+        -------
+        output : str
+            Content of the module's .pxd file, which can be cimported by
+            other Cython modules
+        """
+        return self.declarations_output
 
     def visit_ast(self, ast):
         self.output = render("definitions", enums=self.enums,
                              functions=self.functions, classes=self.classes)
+        self.declarations_output = render(
+            "wrapper_decl", class_names=self.class_names,
+            functions=self.function_declarations,
+            classes=self.class_declarations)
 
     def visit_enum(self, enum):
+        self.includes.add_import("enum", "IntEnum")
         self.enums.append(render("enum", enum=enum))
 
     def visit_typedef(self, typedef):
@@ -355,10 +472,28 @@ class CythonImplementationExporter(AstExporter):
                 cpptype=clazz.get_cppname()), self.ctors)
             class_def["methods"] = map(partial(
                 self._process_method, selftype=clazz.name), self.methods)
+            class_def["buffer"] = self._process_buffer(clazz.name)
+            class_def["iterator"] = self._process_iterator(clazz)
+            if class_def["iterator"] is not None:
+                class_def["comment"] = _add_iteration_note(clazz.comment)
+            class_def["freelist"] = self.config.freelist(clazz.name)
+            class_def["value_type"] = self.config.is_value_type(clazz.name)
+            class_def["final"] = self.config.is_final_class(clazz.name)
+            class_def["shared"] = clazz.name in self.type_info.shared_classes
+            class_def["view"] = clazz.name in map(
+                self.type_info.underlying_type, self.type_info.view_classes)
+            class_def["cimportable"] = self.config.cimportable
+            if class_def["freelist"] or class_def["final"]:
+                self.includes.add_include_for_cython()
         finally:
             self.type_info.remove_specialization()
 
         self.classes.append(render("class", **class_def))
+        if self.config.cimportable:
+            self.class_names.append(clazz.name)
+            self.class_declarations.append(render(
+                "wrapper_class_decl",
+                **dict(class_def, methods=self.method_declarations)))
         self._clear_class()
 
     def visit_template_class(self, template_class):
@@ -366,6 +501,54 @@ class CythonImplementationExporter(AstExporter):
         for clazz in specializer.specialize(template_class):
             self.visit_clazz(clazz, cppname=clazz.get_cppname())
 
+    def _process_buffer(self, class_name):
+        buf = self.config.buffer(class_name)
+        if buf is None:
+            return None
+        element_type = self.type_info.underlying_type(buf["element_type"])
+        if element_type not in BUFFER_FORMATS:
+            warnings.warn("Class '%s' cannot export a buffer of type '%s'."
+                          % (class_name, buf["element_type"]))
+            return None
+        if buf["readonly"]:
+            self.includes.add_cimport("cpython.buffer", "PyBUF_WRITABLE")
+        self.includes.add_include_for(element_type)
+        self.includes.add_cimport("libc.stdlib", "malloc")
+        self.includes.add_cimport("libc.stdlib", "free")
+        buffer_def = dict(buf)
+        buffer_def["element_type"] = element_type
+        buffer_def["format"] = BUFFER_FORMATS[element_type]
+        if buffer_def["format"] in "fd":
+            buffer_def["kind"] = "f"
+        elif buffer_def["format"].isupper():
+            buffer_def["kind"] = "u"
+        else:
+            buffer_def["kind"] = "i"
+        return buffer_def
+
+    def _process_iterator(self, clazz):
+        if not clazz.is_iterable():
+            return None
+        iterator = "%s_iterator" % clazz.name
+        try:
+            converter = create_type_converter(
+                clazz.iterator_value_type, None, self.type_info, self.config,
+                ([], None, "%s::begin" % clazz.name))
+            converter.add_includes(self.includes)
+            value_def = {
+                "def_prefix": "cdef inline", "name": "_%s_value" % iterator,
+                "args": "cpp.%s it" % iterator,
+                "call": catch_result(converter.cpp_type_decl(), "deref(it)"),
+                "return_output": converter.return_output()}
+        except NotImplementedError as e:
+            warnings.warn("%s Class '%s' will not be iterable."
+                          % (e, clazz.name))
+            return None
+        self.includes.add_include_for_deref()
+        self.includes.add_cimport("cython.operator", "preincrement")
+        self.functions.append(render("function", **value_def))
+        return {"type": iterator, "value": value_def["name"]}
+
     def visit_field(self, field):
         self.fields.append(field)
 
@@ -373,17 +556,23 @@ class CythonImplementationExporter(AstExporter):
         try:
             setter_def = SetterDefinition(
                 selftype, field, self.includes, self.type_info,
-                self.config).make()
+                self.config)
+            reference_view = is_reference_view(
+                field.class_name, field.name, field.tipe, self.type_info,
+                self.config)
             getter_def = GetterDefinition(
                 selftype, field, self.includes, self.type_info,
-                self.config).make()
-            return {
+                self.config, reference_view)
+            field_def = {
                 "name": from_camel_case(field.name),
-                "getter": getter_def,
-                "setter": setter_def
+                "getter": getter_def.make(),
+                "setter": setter_def.make()
             }
+            self._add_method_declaration(getter_def)
+            self._add_method_declaration(setter_def)
+            return field_def
         except NotImplementedError as e:
-            warnings.warn(e.message + " Ignoring field '%s'" % field.name)
+            warnings.warn(str(e) + " Ignoring field '%s'" % field.name)
             field.ignored = True
             return {}
 
@@ -400,10 +589,11 @@ class CythonImplementationExporter(AstExporter):
         try:
             constructor_def = ConstructorDefinition(
                 selftype, ctor.comment, ctor.nodes, self.includes,
-                self.type_info, self.config, cpptype)
+                self.type_info, self.config, cpptype,
+                nogil=self.config.is_gil_released_in_class(ctor.class_name))
             return constructor_def.make()
         except NotImplementedError as e:
-            warnings.warn(e.message + " Ignoring method '%s'" % ctor.name)
+            warnings.warn(str(e) + " Ignoring method '%s'" % ctor.name)
             ctor.ignored = True
             return ""
 
@@ -413,36 +603,86 @@ class CythonImplementationExporter(AstExporter):
                           "ignored." % (method.class_name, method.name))
             method.ignored = True
             return
+        buf = self.config.buffer(method.class_name)
+        if buf is not None and method.name == buf["data"]:
+            return  # only declared, used by __getbuffer__
 
         self.methods.append((method, cppname))
 
     def _process_method(self, arg, selftype):
         method, cppname = arg
         try:
-            method_def = MethodDefinition(
+            key = method.name if cppname is None else cppname
+            nogil = self.config.is_gil_released_in_method(
+                method.class_name, key)
+            reference_view = is_method_reference_view(
+                method, key, self.type_info, self.config)
+            definition = MethodDefinition(
                 selftype, method.comment, method.name, method.nodes,
                 self.includes, method.result_type, self.type_info, self.config,
-                cppname=cppname)
-            return method_def.make()
+                cppname=cppname, nogil=nogil, reference_view=reference_view)
+            method_def = definition.make()
+            self._add_method_declaration(definition)
+            if self.config.is_method_vectorized(method.class_name, key):
+                vectorized = VectorizedMethodDefinition(
+                    selftype, method.name, method.nodes, self.includes,
+                    method.result_type, self.type_info, cppname)
+                if vectorized.supported():
+                    method_def += os.linesep * 2 + vectorized.make()
+                else:
+                    warnings.warn("Cannot vectorize method '%s::%s'."
+                                  % (method.class_name, key))
+            return method_def
         except NotImplementedError as e:
-            warnings.warn(e.message + " Ignoring method '%s'" % method.name)
+            warnings.warn(str(e) + " Ignoring method '%s'" % method.name)
             method.ignored = True
             return ""
 
+    def _add_method_declaration(self, definition):
+        declaration = definition.declaration()
+        if declaration is not None:
+            self.method_declarations.append(declaration)
+
     def visit_template_method(self, template_method):
         specializer = MethodSpecializer(self.config)
         for method in specializer.specialize(template_method):
             self.visit_method(method, cppname=template_method.name)
 
     def visit_function(self, function, cppname=None):
+        key = function.name if cppname is None else cppname
+        nogil = self.config.is_gil_released_in_function(key)
         try:
-            self.functions.append(FunctionDefinition(
+            definition = FunctionDefinition(
                 function.name, function.comment, function.nodes, self.includes,
                 function.result_type, self.type_info,
-                self.config, cppname=cppname).make())
+                self.config, cppname=cppname, nogil=nogil)
+            self.functions.append(definition.make())
+            declaration = definition.declaration()
+            if declaration is not None:
+                self.function_declarations.append(declaration)
         except NotImplementedError as e:
-            warnings.warn(e.message + " Ignoring function '%s'" % function.name)
+            warnings.warn(str(e) + " Ignoring function '%s'" % function.name)
             function.ignored = True
+            return
+        if self.config.is_function_vectorized(key):
+            ufunc = UfuncDefinition(
+                function.name, function.nodes, self.includes,
+                function.result_type, self.type_info, cppname,
+                function.noexcept or self.config.is_noexcept_function(key),
+                self._static_method_class(function))
+            if ufunc.supported():
+                self.functions.append(ufunc.make())
+            else:
+                warnings.warn("Cannot create a ufunc from function '%s'."
+                              % key)
+
+    def _static_method_class(self, function):
+        """Name of the class if the function is a static method."""
+        owner = function.namespace.split("::")[-1]
+        if owner in self.type_info.classes:
+            return owner
+        else:
+            return None
 
     def visit_template_function(self, template_function):
         specializer = FunctionSpecializer(self.config)
@@ -454,8 +694,10 @@ class CythonImplementationExporter(AstExporter):
 
 
 class FunctionDefinition(object):
+    reference_view = False
+
     def __init__(self, name, comment, arguments, includes, result_type,
-                 type_info, config, cppname=None):
+                 type_info, config, cppname=None, nogil=False):
         self.name = name
         self.comment = comment
         self.arguments = arguments
@@ -468,6 +710,7 @@ class FunctionDefinition(object):
             self.cppname = self.name
         else:
             self.cppname = cppname
+        self.nogil = nogil
         self.output_is_copy = True
         self._create_type_converters()
 
@@ -480,34 +723,67 @@ class FunctionDefinition(object):
                 continue
             type_converter = create_type_converter(
                 arg.tipe, arg.name, self.type_info, self.config,
-                (self.arguments, i))
+                (self.arguments, i, self._function_key()))
             type_converter.add_includes(self.includes)
             self.type_converters.append(type_converter)
             skip = type_converter.n_cpp_args() - 1
-        self.output_type_converter = create_type_converter(
-            self.result_type, None, self.type_info, self.config)
+        context = (self.arguments, None, self._function_key())
+        if self.reference_view:
+            self.output_type_converter = ReferenceViewTypeConverter(
+                self.result_type, None, self.type_info, context)
+        else:
+            self.output_type_converter = create_type_converter(
+                self.result_type, None, self.type_info, self.config, context)
         self.output_type_converter.add_includes(self.includes)
 
+    def _function_key(self):
+        """Name of the function in the configuration."""
+        return self.cppname
+
     def make(self):
         function = self._signature()
-        function["input_conversions"] = self._input_type_conversions()
-        function["call"] = self._call_cpp_function(self._call_args())
-        function["return_output"] = self.output_type_converter.return_output(
-            self.output_is_copy)
+        function.update(self._body())
         function["comment"] = self.comment
         return render("function", **function)
 
+    def declaration(self):
+        """Declaration of the C-level entry point in the module's .pxd file.
+
+        Returns
+        -------
+        declaration : str or None
+            Signature of the cpdef function or None if the function can only
+            be called from Python
+        """
+        signature = self._signature()
+        if signature["def_prefix"] != "cpdef":
+            return None
+        return templates.wrapper_function_decl % signature
+
+    def _body(self):
+        return {
+            "input_conversions": self._input_type_conversions(),
+            "call": self._call_cpp_function(self._call_args()),
+            "return_output": self.output_type_converter.return_output(
+                self.output_is_copy)
+        }
+
     def _signature(self):
         function_name = from_camel_case(
             self.config.cpp_to_py_operator(self.name))
-        return {"def_prefix": self._def_prefix(function_name),
-                "args": ", ".join(self._cython_signature_args()),
+        def_prefix = self._def_prefix(function_name)
+        args = self._cython_signature_args()
+        if (self.type_converters and
+                self.config.has_positional_only_arguments(
+                    self._function_key())):
+            # Cython does not allow positional-only arguments in cpdef
+            def_prefix = "def"
+            args.append("/")
+        return {"def_prefix": def_prefix, "args": ", ".join(args),
                 "name": function_name}
 
     def _def_prefix(self, function_name):
-        special_method = (function_name.startswith("__") and
-                          function_name.endswith("__"))
-        if special_method:
+        if _is_special_method(function_name):
             return "def"
         else:
             return "cpdef"
@@ -526,35 +802,97 @@ class FunctionDefinition(object):
     def _call_cpp_function(self, call_args):
         call = templates.fun_call % {"name": self.cppname,
                                      "call_args": ", ".join(call_args)}
-        return catch_result(self.output_type_converter.cpp_type_decl(), call)
+        return catch_result(self.output_type_converter.cpp_type_decl(), call,
+                            self.nogil)
+
+
+def _is_special_method(function_name):
+    return function_name.startswith("__") and function_name.endswith("__")
 
 
 class ConstructorDefinition(FunctionDefinition):
     def __init__(self, class_name, comment, arguments, includes, type_info,
-                 config, cpp_classname):
+                 config, cpp_classname, nogil=False):
+        self.class_name = class_name
         super(ConstructorDefinition, self).__init__(
             "__init__", comment, arguments, includes, result_type=None,
-            type_info=type_info, config=config)
+            type_info=type_info, config=config, nogil=nogil)
         self.initial_args = ["%s self" % class_name]
         self.cpp_classname = cpp_classname
 
+    def _function_key(self):
+        return "%s::%s" % (self.class_name, self.class_name)
+
     def _call_cpp_function(self, call_args):
-        return templates.ctor_call % {"class_name": self.cpp_classname,
-                                      "call_args": ", ".join(call_args)}
+        if self.config.is_value_type(self.class_name):
+            template = templates.value_ctor_call
+        else:
+            template = templates.ctor_call
+        call = template % {"class_name": self.cpp_classname,
+                           "call_args": ", ".join(call_args)}
+        return catch_result("", call, self.nogil)
 
 
 class MethodDefinition(FunctionDefinition):
     def __init__(self, class_name, comment, name, arguments, includes,
-                 result_type, type_info, config, cppname=None):
+                 result_type, type_info, config, cppname=None, nogil=False,
+                 reference_view=False):
+        self.class_name = class_name
+        self.reference_view = reference_view
         super(MethodDefinition, self).__init__(
-            name, comment, arguments, includes, result_type, type_info, config, cppname)
+            name, comment, arguments, includes, result_type, type_info, config,
+            cppname, nogil)
         self.initial_args = ["%s self" % class_name]
 
+    def _function_key(self):
+        return "%s::%s" % (self.class_name, self.cppname)
+
+    def _signature(self):
+        # e.g. dereference with 'operator*', Python only has binary operators
+        if (self.name.startswith("operator") and self.name != "operator()" and
+                len(self.arguments) == 0):
+            raise NotImplementedError("Cannot convert unary C++ operator '%s' "
+                                      "to Python operator." % self.name)
+        return super(MethodDefinition, self)._signature()
+
+    def make(self):
+        signature = self._signature()
+        if not self._is_inline(signature["name"]):
+            return super(MethodDefinition, self).make()
+        # Python calls the def function, Cython can call the implementation
+        implementation_name = "_%s_impl" % signature["name"]
+        implementation = dict(
+            signature, def_prefix="cdef inline", name=implementation_name,
+            args=", ".join(self._cython_signature_args()))
+        implementation.update(self._body())
+        wrapper = dict(signature, def_prefix="def", comment=self.comment)
+        wrapper["return_output"] = "return self.%s(%s)" % (
+            implementation_name, ", ".join(
+                tc.python_argname for tc in self.type_converters))
+        return (render("function", **implementation).rstrip() +
+                os.linesep * 2 + render("function", **wrapper))
+
+    def declaration(self):
+        signature = self._signature()
+        if not self._is_inline(signature["name"]):
+            return super(MethodDefinition, self).declaration()
+        # a cdef declaration matches the cdef inline implementation
+        return templates.wrapper_function_decl % {
+            "def_prefix": "cdef", "name": "_%s_impl" % signature["name"],
+            "args": ", ".join(self._cython_signature_args())}
+
+    def _is_inline(self, function_name):
+        return (not _is_special_method(function_name) and
+                self.config.is_method_inline(self.class_name, self.cppname))
+
     def _call_cpp_function(self, call_args):
         call = templates.method_call % {
             "name": self.config.call_operators.get(self.cppname, self.cppname),
             "call_args": ", ".join(call_args)}
-        return catch_result(self.output_type_converter.cpp_type_decl(), call)
+        if self.reference_view:
+            call = "&" + call
+        return catch_result(self.output_type_converter.cpp_type_decl(), call,
+                            self.nogil)
 
 
 class SetterDefinition(MethodDefinition):
@@ -572,21 +910,116 @@ class SetterDefinition(MethodDefinition):
 
 
 class GetterDefinition(MethodDefinition):
-    def __init__(self, python_classname, field, includes, type_info, config):
+    def __init__(self, python_classname, field, includes, type_info, config,
+                 reference_view=False):
         name = "__get_%s" % field.name
         super(GetterDefinition, self).__init__(
             python_classname, "", name, [], includes, field.tipe, type_info,
-            config)
+            config, reference_view=reference_view)
         self.output_is_copy = False
         self.field_name = field.name
 
     def _call_cpp_function(self, call_args):
         assert len(call_args) == 0
         call = templates.getter_call % {"name": self.field_name}
+        if self.reference_view:
+            call = "&" + call
         return catch_result(self.output_type_converter.cpp_type_decl(), call)
 
 
-def catch_result(result_type_decl, call):
+class UfuncDefinition(object):
+    """NumPy ufunc that calls a C++ function for each element.
+
+    The ufunc supports broadcasting, output arguments and all other features
+    of NumPy's ufuncs. All arguments and the result must be numbers. The
+    loop runs without the GIL. Unless the function cannot throw, a C++
+    exception stops the loop and the ufunc raises the translated exception.
+    Static methods are prefixed with the name of their class, e.g.,
+    'my_class_my_method_vec'.
+    """
+    def __init__(self, name, arguments, includes, result_type, type_info,
+                 cppname=None, noexcept=False, class_name=None):
+        self.name = from_camel_case(name)
+        if class_name is not None:
+            self.name = from_camel_case(class_name) + "_" + self.name
+        self.noexcept = noexcept
+        self.arguments = arguments
+        self.includes = includes
+        self.result_type = result_type
+        self.type_info = type_info
+        if cppname is None:
+            self.cppname = name
+        else:
+            self.cppname = cppname
+
+    def supported(self):
+        """Can the function be vectorized?"""
+        types = [self.type_info.underlying_type(t) for t in
+                 [arg.tipe for arg in self.arguments] + [self.result_type]]
+        return (len(self.arguments) > 0 and
+                all(t in BUFFER_FORMATS for t in types))
+
+    def _element_type(self, tname):
+        return self.type_info.underlying_type(tname)
+
+    def _call(self, element):
+        call_args = [element % (self._element_type(arg.tipe), i)
+                     for i, arg in enumerate(self.arguments)]
+        return templates.fun_call % {"name": self.cppname,
+                                     "call_args": ", ".join(call_args)}
+
+    def make(self):
+        self.includes.add_include_for_ufunc()
+        args = [{"name": "in%d" % i,
+                 "numpy_type": NUMPY_TYPES[self._element_type(arg.tipe)]}
+                for i, arg in enumerate(self.arguments)]
+        result_type = self._element_type(self.result_type)
+        return render("ufunc", name=self.name, args=args,
+                      result_type=result_type, noexcept=self.noexcept,
+                      result_numpy_type=NUMPY_TYPES[result_type],
+                      call=self._call("(<%s *> in%d)[0]"))
+
+
+class VectorizedMethodDefinition(UfuncDefinition):
+    """Method that calls a C++ method for each element of 1D arrays.
+
+    The loop runs without the GIL and the result is a new NumPy array.
+    """
+    def __init__(self, class_name, name, arguments, includes, result_type,
+                 type_info, cppname=None):
+        super(VectorizedMethodDefinition, self).__init__(
+            name, arguments, includes, result_type, type_info, cppname)
+        self.class_name = class_name
+
+    def _call(self, element):
+        call_args = [element % replace_keyword_argnames(arg.name)
+                     for arg in self.arguments]
+        return templates.method_call % {"name": self.cppname,
+                                        "call_args": ", ".join(call_args)}
+
+    def make(self):
+        self.includes.add_include_for_numpy()
+        self.includes.add_include_for_cython()
+        args = [{"name": replace_keyword_argnames(arg.name),
+                 "type": self._element_type(arg.tipe)}
+                for arg in self.arguments]
+        for arg in args:
+            self.includes.add_include_for(arg["type"])
+        result_type = self._element_type(self.result_type)
+        return render("vectorized_method", name=self.name,
+                      class_name=self.class_name, args=args,
+                      result_type=result_type,
+                      result_format=BUFFER_FORMATS[result_type],
+                      call=self._call("%s[i]"))
+
+
+def catch_result(result_type_decl, call, nogil=False):
+    if nogil:
+        if result_type_decl == "":
+            return templates.nogil_call % {"call": call}
+        else:
+            return templates.nogil_catch_result % {
+                "cpp_type_decl": result_type_decl, "call": call}
     if result_type_decl == "":
         return call
     else:
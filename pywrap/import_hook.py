@@ -1,42 +1,421 @@
 import os
+import re
 import sys
+import glob
+import shutil
+import time
+import fcntl
+import hashlib
+import tempfile
+import threading
+import types
+from contextlib import contextmanager
+from importlib.abc import MetaPathFinder, Loader
+from importlib.machinery import (ModuleSpec, ExtensionFileLoader,
+                                 EXTENSION_SUFFIXES)
+from . import __version__
 from .cython import make_cython_wrapper, write_files, run_setup
-from .utils import remove_files
 from .defaultconfig import Config
 
 
-class CppFinder(object):
-    """Finds C++ headers and builds Python bindings."""
-    def __init__(self, import_path="."):
+class CppFinder(MetaPathFinder):
+    """Finds C++ headers and builds Python bindings.
+
+    Built extensions are stored in a cache directory. Each entry is keyed by
+    the content of the header and of all headers that it includes directly or
+    indirectly, the configuration and the Python ABI, so that a module is
+    only built once per user and can be loaded from any working directory.
+    Entries that are stale because a dependency changed will be removed.
+
+    Only one process builds an extension at a time. Other processes that
+    import the same module wait until the build is finished and load the
+    result.
+
+    In lazy mode, the import statement only returns a placeholder module.
+    The extension will be built and loaded when an attribute of the module
+    is accessed for the first time.
+
+    Parameters
+    ----------
+    import_path : str, optional (default: '.')
+        Directory that contains the C++ headers
+
+    cache_dir : str, optional (default: user cache directory)
+        Directory in which built extensions are stored, see
+        :func:`default_cache_dir`
+
+    timeout : float, optional (default: 600)
+        Maximum time in seconds that we wait for another process that builds
+        the same extension
+
+    lazy : bool, optional (default: False)
+        Defer building the extension until the module is used
+    """
+    def __init__(self, import_path=".", cache_dir=None, timeout=600.0,
+                 lazy=False):
         self.config = Config()
         self.import_path = import_path
+        if cache_dir is None:
+            cache_dir = default_cache_dir()
+        self.cache_dir = cache_dir
+        self.timeout = timeout
+        self.lazy = lazy
 
-    def find_module(self, fullname, path):
-        header_ending = None
-        for ending in self.config.cpp_header_endings:
-            if os.path.exists(self.import_path + os.sep + fullname + "." +
-                              ending):
-                header_ending = ending
-                break
-        if header_ending is None:
+    def find_spec(self, fullname, path, target=None):
+        if path is not None:
             return None
+        header = self._find_header(fullname)
+        if header is None:
+            return None
+
+        if self.lazy:
+            loader = LazyCppLoader(self, header)
+        else:
+            loader = CppLoader(self, header)
+        return ModuleSpec(fullname, loader, origin=header)
+
+    def extension(self, fullname, header):
+        """Get the extension that wraps a header, build it if necessary.
+
+        Parameters
+        ----------
+        fullname : str
+            Name of the module
+
+        header : str
+            Path to the C++ header
+
+        Returns
+        -------
+        lib : str
+            Path to the built extension
+        """
+        entry = self.cache_entry(fullname, header)
+        lib = _find_extension(entry, fullname)
+        if lib is None:
+            lib = self._build_once(fullname, header, entry)
+        return lib
+
+    def _find_header(self, fullname):
+        for ending in self.config.cpp_header_endings:
+            header = os.path.join(self.import_path, fullname + "." + ending)
+            if os.path.exists(header):
+                return os.path.abspath(header)
+        return None
 
-        header = self.import_path + os.sep + fullname + "." + header_ending
-        lib = fullname + ".so"
-        if not os.path.exists(lib):
-            files = make_cython_wrapper(header, [], config=self.config)
-            files["setup_import.py"] = files["setup.py"]
-            del files["setup.py"]
+    def cache_entry(self, fullname, header):
+        """Directory of the cache entry for a header.
 
-            write_files(files)
+        Parameters
+        ----------
+        fullname : str
+            Name of the module
+
+        header : str
+            Path to the C++ header
+
+        Returns
+        -------
+        entry : str
+            Directory that contains the built extension
+        """
+        key = hashlib.sha1()
+        for _, digest in _dependency_hashes(header, self.import_path):
+            key.update(digest.encode("utf-8"))
+        key.update(_config_fingerprint(self.config).encode("utf-8"))
+        key.update(_abi_tag().encode("utf-8"))
+        return os.path.join(self.cache_dir,
+                            "%s-%s" % (fullname, key.hexdigest()))
+
+    def _build_once(self, fullname, header, entry):
+        try:
+            os.makedirs(self.cache_dir)
+        except OSError:
+            if not os.path.isdir(self.cache_dir):
+                raise
+        error_file = entry + ".error"
+        start = time.time()
+        with build_lock(entry + ".lock", self.timeout):
+            lib = _find_extension(entry, fullname)
+            if lib is not None:
+                return lib
+            if os.path.exists(error_file):
+                if os.path.getmtime(error_file) >= start:
+                    with open(error_file, "r") as f:
+                        raise ImportError(f.read())
+                os.remove(error_file)
             try:
-                run_setup("setup_import.py")
-            finally:
-                filenames = [fullname + ".cpp"]
-                filenames.extend(files.keys())
-                remove_files(filenames)
+                lib = self._build(fullname, header, entry)
+            except Exception as e:
+                with open(error_file, "w") as f:
+                    f.write(str(e))
+                raise
+            _remove_stale_entries(self.cache_dir, fullname, entry)
+        return lib
+
+    def _build(self, fullname, header, entry):
+        builddir = tempfile.mkdtemp(prefix=fullname + "-", dir=self.cache_dir)
+        try:
+            files = make_cython_wrapper(header, [], config=self.config,
+                                        target=builddir)
+            write_files(files, builddir)
+            status = run_setup("setup.py", target=builddir)
+            lib = _find_extension(builddir, fullname)
+            if lib is None:
+                raise ImportError(
+                    "Could not build extension '%s' from '%s', setup script "
+                    "exited with status %d." % (fullname, header, status))
+            if not os.path.exists(entry):
+                os.makedirs(entry)
+            _write_dependencies(
+                entry, _dependency_hashes(header, self.import_path))
+            shutil.move(lib, entry)
+        finally:
+            shutil.rmtree(builddir, ignore_errors=True)
+        return _find_extension(entry, fullname)
+
+
+class CppLoader(Loader):
+    """Loads the extension that wraps a C++ header.
+
+    Parameters
+    ----------
+    finder : CppFinder
+        Finder that builds the extension
+
+    header : str
+        Path to the C++ header
+    """
+    def __init__(self, finder, header):
+        self.finder = finder
+        self.header = header
+        self.extension_loader = None
+
+    def create_module(self, spec):
+        spec.origin = self.finder.extension(spec.name, self.header)
+        spec.has_location = True
+        self.extension_loader = ExtensionFileLoader(spec.name, spec.origin)
+        return self.extension_loader.create_module(spec)
 
+    def exec_module(self, module):
+        self.extension_loader.exec_module(module)
+
+
+class LazyCppLoader(CppLoader):
+    """Loads the extension that wraps a C++ header on first attribute access.
+
+    The module is a placeholder until one of its attributes is accessed. This
+    follows the semantics of importlib.util.LazyLoader, which cannot be used
+    directly because an extension module is created by its init function.
+    Other threads that access the module during the build wait until it has
+    been loaded.
+    """
+    def create_module(self, spec):
         return None
 
+    def exec_module(self, module):
+        module.__spec__.loader_state = {
+            "lock": threading.RLock(), "is_loading": False}
+        module.__class__ = _LazyModule
+
+    def load_extension(self, module):
+        """Build and load the extension, then fill the placeholder module."""
+        spec = module.__spec__
+        lib = self.finder.extension(spec.name, self.header)
+        extension_spec = ModuleSpec(spec.name, ExtensionFileLoader(
+            spec.name, lib), origin=lib)
+        extension_spec.has_location = True
+        extension = extension_spec.loader.create_module(extension_spec)
+        extension_spec.loader.exec_module(extension)
+        module.__dict__.update(extension.__dict__)
+
+
+class _LazyModule(types.ModuleType):
+    """Placeholder module that loads the extension on attribute access."""
+    def __getattribute__(self, attr):
+        spec = object.__getattribute__(self, "__spec__")
+        loader_state = spec.loader_state
+        with loader_state["lock"]:
+            if type(self) is _LazyModule:
+                # the loader accesses the module while it fills it
+                if loader_state["is_loading"]:
+                    return object.__getattribute__(self, attr)
+                loader_state["is_loading"] = True
+                try:
+                    spec.loader.load_extension(self)
+                finally:
+                    loader_state["is_loading"] = False
+                self.__class__ = types.ModuleType
+        return getattr(self, attr)
+
+    def __delattr__(self, attr):
+        self.__getattribute__("__dict__")
+        delattr(self, attr)
+
+
+@contextmanager
+def build_lock(filename, timeout):
+    """Exclusive lock that is shared between processes.
+
+    Parameters
+    ----------
+    filename : str
+        Lock file, will be created if it does not exist
+
+    timeout : float
+        Maximum time in seconds that we wait for the lock
+    """
+    with open(filename, "a") as f:
+        deadline = time.time() + timeout
+        while True:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except (IOError, OSError):
+                if time.time() > deadline:
+                    raise ImportError(
+                        "Timeout after %g seconds while waiting for lock '%s'."
+                        % (timeout, filename))
+                time.sleep(0.1)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def default_cache_dir():
+    """Directory in which the import hook stores built extensions.
+
+    The directory can be set with the environment variable PYWRAP_CACHE_DIR.
+    Otherwise it is 'pywrap' in the user's cache directory.
+    """
+    if "PYWRAP_CACHE_DIR" in os.environ:
+        return os.environ["PYWRAP_CACHE_DIR"]
+    cache_home = os.environ.get(
+        "XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache"))
+    return os.path.join(cache_home, "pywrap")
+
+
+def _find_extension(directory, fullname):
+    for suffix in EXTENSION_SUFFIXES:
+        lib = os.path.join(directory, fullname + suffix)
+        if os.path.exists(lib):
+            return lib
+    return None
+
+
+def dependencies(header, incdirs=()):
+    """Find the header and all local headers that it includes.
+
+    Includes with quotes are searched relative to the including file and in
+    the include directories. System headers are ignored.
+
+    Parameters
+    ----------
+    header : str
+        Path to the C++ header
+
+    incdirs : list, optional (default: [])
+        Include directories
+
+    Returns
+    -------
+    filenames : list
+        Absolute paths of the header and its direct and indirect includes
+    """
+    header = os.path.abspath(header)
+    filenames = [header]
+    i = 0
+    while i < len(filenames):
+        for include in _local_includes(filenames[i], incdirs):
+            if include not in filenames:
+                filenames.append(include)
+        i += 1
+    return filenames
+
+
+def _local_includes(header, incdirs):
+    with open(header, "r") as f:
+        names = re.findall(r"^\s*#\s*include\s*\"([^\"]+)\"", f.read(),
+                           re.MULTILINE)
+    includes = []
+    for name in names:
+        for dirname in [os.path.dirname(header)] + list(incdirs):
+            include = os.path.join(dirname, name)
+            if os.path.exists(include):
+                includes.append(os.path.abspath(include))
+                break
+    return includes
+
+
+def _dependency_hashes(header, import_path):
+    return [(filename, _hash_file(filename))
+            for filename in dependencies(header, [import_path])]
+
+
+def _hash_file(filename):
+    with open(filename, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def _write_dependencies(entry, dependency_hashes):
+    with open(os.path.join(entry, "dependencies"), "w") as f:
+        for filename, digest in dependency_hashes:
+            f.write("%s %s\n" % (digest, filename))
+
+
+def is_stale(entry):
+    """Check if a dependency of a cache entry changed.
+
+    Parameters
+    ----------
+    entry : str
+        Directory of the cache entry
+
+    Returns
+    -------
+    stale : bool
+        The entry is stale if one of the headers from which it has been
+        built has been modified or removed
+    """
+    manifest = os.path.join(entry, "dependencies")
+    if not os.path.exists(manifest):
+        return False
+    with open(manifest, "r") as f:
+        for line in f:
+            digest, filename = line.rstrip("\n").split(" ", 1)
+            if not os.path.exists(filename) or _hash_file(filename) != digest:
+                return True
+    return False
+
+
+def _remove_stale_entries(cache_dir, fullname, current_entry):
+    pattern = os.path.join(cache_dir, fullname + "-*")
+    for entry in glob.glob(pattern):
+        if (entry == current_entry or not os.path.isdir(entry) or
+                not is_stale(entry)):
+            continue
+        try:
+            with build_lock(entry + ".lock", 0.0):
+                shutil.rmtree(entry, ignore_errors=True)
+        except ImportError:
+            pass  # another process uses this entry
+
+
+def _config_fingerprint(config):
+    items = []
+    for name, value in sorted(vars(config).items()):
+        if name == "registered_converters":
+            value = ["%s.%s" % (c.__module__, c.__name__) for c in value]
+        elif isinstance(value, dict):
+            value = sorted(value.items())
+        items.append("%s=%r" % (name, value))
+    return ";".join(items)
+
+
+def _abi_tag():
+    return "%s;%s;pywrap-%s" % (EXTENSION_SUFFIXES[0], sys.version, __version__)
+
 
-sys.meta_path.append(CppFinder())
+finder = CppFinder()
+sys.meta_path.append(finder)
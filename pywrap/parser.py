@@ -1,11 +1,15 @@
 from .defaultconfig import Config
 import warnings
 import os
+import re
 from .libclang import cindex, CLANG_VERSION, CLANG_INCDIR
-from .type_conversion import cythontype_from_cpptype
+from .type_conversion import (cythontype_from_cpptype, is_lvalue_reference,
+                              is_const_lvalue_reference, STDINT_TYPES,
+                              STRUCT_FIELD_FORMATS)
 from .ast import (Ast, Enum, Typedef, Clazz, Function, TemplateClass,
                   TemplateFunction, Constructor, Method, TemplateMethod,
                   Param, Field)
+from .templates import render
 from .utils import make_header, convert_to_docstring
 
 
@@ -30,12 +34,34 @@ class Includes:
                     "queue": False,
                     "set": False,
                     "stack": False}
+        self.stdint = set()
+        self.memory = set()
         self.deref = False
+        self.matrix = False
+        self.vector_owners = {}
+        self.struct_dtypes = {}
+        self.vector_views = {}
+        self.container_views = {}
+        self.string_owner = False
+        self.new_copy = False
+        self.result = False
+        self.cimports = {}
+        self.imports = {}
+        self.std_arrays = {}
+        self.flat_view = False
+        self.ufunc = False
+        self.cython = False
 
     def add_include_for(self, tname):
         for t in self.stl.keys():
             if self._part_of_tname(tname, t):
                 self.stl[t] = True
+        for t in STDINT_TYPES:
+            if re.search(r"\b%s\b" % t, tname):
+                self.stdint.add(t)
+        for t in ["shared_ptr", "unique_ptr"]:
+            if re.search(r"\b%s\[" % t, tname):
+                self.memory.add(t)
 
     def add_include_for_deref(self):
         self.deref = True
@@ -43,6 +69,69 @@ class Includes:
     def add_include_for_numpy(self):
         self.numpy = True
 
+    def add_include_for_matrix(self):
+        self.matrix = True
+
+    def add_include_for_cython(self):
+        self.cython = True
+
+    def add_include_for_ufunc(self):
+        self.numpy = True
+        self.ufunc = True
+
+    def add_cimport(self, module, name):
+        if module not in self.cimports:
+            self.cimports[module] = set()
+        self.cimports[module].add(name)
+
+    def add_import(self, module, name):
+        if module not in self.imports:
+            self.imports[module] = set()
+        self.imports[module].add(name)
+
+    def add_include_for_flat_view(self):
+        self.add_cimport("cpython.buffer", "PyObject_CheckBuffer")
+        self.flat_view = True
+
+    def add_std_array(self, cython_tname, element_type, size):
+        self.std_arrays[cython_tname] = (element_type, size)
+
+    def add_vector_owner(self, owner, element_type, format):
+        self.vector_owners[owner] = (element_type, format)
+
+    def add_struct_dtype(self, name, layout):
+        self.add_include_for_numpy()
+        self.struct_dtypes[name] = layout
+
+    def add_include_for_new_copy(self):
+        self.new_copy = True
+
+    def add_include_for_result(self):
+        self.result = True
+
+    def add_vector_view(self, view, class_name):
+        self.add_import("collections.abc", "Sequence")
+        self.vector_views[view] = class_name
+
+    def add_container_view(self, view, key_type, value_type=None):
+        self.add_include_for_deref()
+        self.add_cimport("cython.operator", "preincrement")
+        self.add_cimport("cpython.number", "PyNumber_Check")
+        if value_type is None:
+            self.add_import("collections.abc", "Iterable")
+            self.add_import("collections.abc", "Set")
+        else:
+            self.add_import("collections.abc", "Mapping")
+            self.add_import("collections.abc", "ItemsView")
+            self.add_import("collections.abc", "KeysView")
+            self.add_import("collections.abc", "ValuesView")
+        self.container_views[view] = (key_type, value_type)
+
+    def add_include_for_string_owner(self):
+        self.stl["string"] = True
+        self.add_cimport("cpython.buffer", "PyBUF_WRITABLE")
+        self.string_owner = True
+
     def _part_of_tname(self, tname, subtname):
         return (tname == subtname or tname.startswith(subtname) or
                 ("<" + subtname + ">") in tname or
@@ -53,6 +142,17 @@ class Includes:
                 (", " + subtname + "]") in tname)
 
     def declarations_import(self):
+        includes = self._cimport_types()
+        if self.result:
+            includes += os.linesep + render("result") + os.linesep
+        for cython_tname in sorted(self.std_arrays.keys()):
+            element_type, size = self.std_arrays[cython_tname]
+            includes += os.linesep + render(
+                "std_array", cython_tname=cython_tname,
+                element_type=element_type, size=size) + os.linesep
+        return includes
+
+    def _cimport_types(self):
         includes = "from libcpp cimport bool" + os.linesep
 
         for t in self.stl.keys():
@@ -60,17 +160,74 @@ class Includes:
                 includes += ("from libcpp.%(type)s cimport %(type)s"
                              % {"type": t}) + os.linesep
 
+        if self.stdint:
+            includes += ("from libc.stdint cimport %s"
+                         % ", ".join(sorted(self.stdint))) + os.linesep
+
+        if self.memory:
+            includes += ("from libcpp.memory cimport %s"
+                         % ", ".join(sorted(self.memory))) + os.linesep
+
+        return includes
+
+    def wrapper_declarations_import(self):
+        includes = self._cimport_types()
+        if self.cython:
+            includes += "cimport cython" + os.linesep
+        includes += "cimport _declarations as cpp" + os.linesep
         return includes
 
     def implementations_import(self):
-        includes = self.declarations_import()
+        includes = self._cimport_types()
+        if self.cython:
+            includes += "cimport cython" + os.linesep
         if self.numpy:
             includes += "cimport numpy as np" + os.linesep
             includes += "import numpy as np" + os.linesep
+        if self.ufunc:
+            includes += "np.import_ufunc()" + os.linesep
         if self.deref:
             includes += ("from cython.operator cimport dereference as deref" +
                          os.linesep)
+        for module in sorted(self.cimports.keys()):
+            includes += ("from %s cimport %s" % (
+                module, ", ".join(sorted(self.cimports[module])))
+                + os.linesep)
         includes += "cimport _declarations as cpp" + os.linesep
+        for module in sorted(self.imports.keys()):
+            includes += ("from %s import %s" % (
+                module, ", ".join(sorted(self.imports[module])))
+                + os.linesep)
+        if self.new_copy:
+            includes += os.linesep + render("new_copy") + os.linesep
+        if self.flat_view:
+            includes += os.linesep + render("flat_view") + os.linesep
+        if self.matrix:
+            includes += os.linesep + render("matrix") + os.linesep
+        if self.string_owner:
+            includes += os.linesep + render("string_owner") + os.linesep
+        for name in sorted(self.struct_dtypes.keys()):
+            includes += os.linesep + render(
+                "struct_dtype", name=name,
+                **self.struct_dtypes[name]) + os.linesep
+        for owner in sorted(self.vector_owners.keys()):
+            element_type, format = self.vector_owners[owner]
+            includes += os.linesep + render(
+                "vector_owner", owner=owner, element_type=element_type,
+                format=format) + os.linesep
+        for view in sorted(self.vector_views.keys()):
+            includes += os.linesep + render(
+                "vector_view", view=view,
+                class_name=self.vector_views[view]) + os.linesep
+        for view in sorted(self.container_views.keys()):
+            key_type, value_type = self.container_views[view]
+            if value_type is None:
+                template = "set_view"
+            else:
+                template = "map_view"
+            includes += os.linesep + render(
+                template, view=view, key_type=key_type,
+                value_type=value_type) + os.linesep
         return includes
 
 
@@ -82,6 +239,9 @@ class TypeInfo:
         if typedefs is not None:
             self.typedefs.update(typedefs)
         self.enums = []
+        self.shared_classes = []
+        self.view_classes = []
+        self.struct_layouts = {}
         self.spec = {}
 
     def attach_specialization(self, spec):
@@ -138,6 +298,74 @@ LITERAL_NODES = {
 }
 
 
+SEQUENCE_CONTAINERS = [
+    "array", "deque", "forward_list", "list", "multiset", "set",
+    "unordered_multiset", "unordered_set", "vector"]
+ASSOCIATIVE_CONTAINERS = [
+    "map", "multimap", "unordered_map", "unordered_multimap"]
+
+
+def iterator_value_type(tipe):
+    """Type of the elements that an iterator points to.
+
+    Only pointers and iterators of STL containers are recognized.
+
+    Parameters
+    ----------
+    tipe : clang.cindex.Type
+        Type of the iterator
+
+    Returns
+    -------
+    value_type : str or None
+        C++ type of the elements or None if it is unknown
+    """
+    if tipe.kind == cindex.TypeKind.POINTER:
+        return tipe.get_pointee().spelling
+    declaration = tipe.get_declaration()
+    # follow typedefs of iterators in the class to the container's typedef
+    while (declaration.kind == cindex.CursorKind.TYPEDEF_DECL and
+           declaration.semantic_parent.type.get_num_template_arguments() < 0):
+        underlying_type = declaration.underlying_typedef_type
+        if underlying_type.kind == cindex.TypeKind.POINTER:
+            return underlying_type.get_pointee().spelling
+        declaration = underlying_type.get_declaration()
+    if declaration.kind != cindex.CursorKind.TYPEDEF_DECL:
+        return None
+    container = declaration.semantic_parent
+    if container.spelling in SEQUENCE_CONTAINERS:
+        return _template_argument(container.type, 0)
+    elif container.spelling in ASSOCIATIVE_CONTAINERS:
+        return "std::pair<%s, %s>" % (_template_argument(container.type, 0),
+                                      _template_argument(container.type, 1))
+    else:
+        return None
+
+
+def _template_argument(tipe, i):
+    # template arguments are spelled without typedefs
+    return re.sub(r"std::(__cxx11::)?basic_string<char>", "std::string",
+                  tipe.get_template_argument_type(i).spelling)
+
+
+def points_to_const(tipe):
+    """Does a pointer or reference point to const data?"""
+    return tipe.get_pointee().is_const_qualified()
+
+
+def cannot_throw(node):
+    """Is a function declared with noexcept or throw()?
+
+    Old versions of libclang do not report exception specifications.
+    """
+    try:
+        kind = node.exception_specification_kind
+    except (AttributeError, cindex.LibclangError):
+        return False
+    return kind in [cindex.ExceptionSpecificationKind.BASIC_NOEXCEPT,
+                    cindex.ExceptionSpecificationKind.DYNAMIC_NONE]
+
+
 class Parser(object):
     """The parser builds the abstract syntax tree (AST).
 
@@ -279,12 +507,14 @@ class Parser(object):
                     self.namespace = self.namespace + "::" + node.displayname
             elif node.kind == cindex.CursorKind.PARM_DECL:
                 parse_children = self.add_param(
-                    node.displayname, node.type.spelling)
+                    node.displayname, node.type.spelling,
+                    points_to_const(node.type))
                 param_added = True
             elif node.kind == cindex.CursorKind.FUNCTION_DECL:
                 parse_children = self.add_function(
                     node.spelling, node.result_type.spelling,
-                    self.namespace, convert_to_docstring(node.raw_comment))
+                    self.namespace, convert_to_docstring(node.raw_comment),
+                    cannot_throw(node))
             elif node.kind == cindex.CursorKind.CLASS_TEMPLATE:
                 name = node.displayname.split("<")[0]
                 self.add_template_class(
@@ -294,11 +524,13 @@ class Parser(object):
                 if self.last_type is None:
                     self.add_template_function(
                         node.spelling, node.result_type.spelling,
-                        convert_to_docstring(node.raw_comment))
+                        convert_to_docstring(node.raw_comment),
+                        cannot_throw(node))
                 else:
                     self.add_template_method(
                         node.spelling, node.result_type.spelling,
-                        convert_to_docstring(node.raw_comment))
+                        convert_to_docstring(node.raw_comment),
+                        cannot_throw(node))
             elif node.kind == cindex.CursorKind.TEMPLATE_TYPE_PARAMETER:
                 self.add_template_type(node.displayname)
             elif node.kind == cindex.CursorKind.TEMPLATE_NON_TYPE_PARAMETER:
@@ -315,11 +547,18 @@ class Parser(object):
                         namespace += self.last_type.name
                         parse_children = self.add_function(
                             node.spelling, node.result_type.spelling,
-                            namespace, convert_to_docstring(node.raw_comment))
+                            namespace, convert_to_docstring(node.raw_comment),
+                            cannot_throw(node))
                     else:
-                        parse_children = self.add_method(
-                            node.spelling, node.result_type.spelling,
-                            convert_to_docstring(node.raw_comment))
+                        value_type = self._iterator_value_type(node)
+                        if value_type is not None:
+                            parse_children = self.add_iterator_method(
+                                node.spelling, value_type)
+                        else:
+                            parse_children = self.add_method(
+                                node.spelling, node.result_type.spelling,
+                                convert_to_docstring(node.raw_comment),
+                                cannot_throw(node))
                 else:
                     parse_children = False
             elif node.kind == cindex.CursorKind.CONSTRUCTOR:
@@ -331,6 +570,7 @@ class Parser(object):
             elif node.kind == cindex.CursorKind.CLASS_DECL:
                 parse_children = self.add_class(
                     node.displayname, convert_to_docstring(node.raw_comment))
+                self.add_struct_layout(node)
                 class_added = True
             elif node.kind == cindex.CursorKind.CXX_BASE_SPECIFIER:
                 if self.last_type.base is not None:
@@ -343,6 +583,7 @@ class Parser(object):
                 parse_children = False
             elif node.kind == cindex.CursorKind.STRUCT_DECL:
                 parse_children = self.add_struct_decl(node.displayname)
+                self.add_struct_layout(node)
             elif node.kind == cindex.CursorKind.FIELD_DECL:
                 if node.access_specifier == cindex.AccessSpecifier.PUBLIC:
                     parse_children = self.add_field(
@@ -381,7 +622,7 @@ class Parser(object):
                 print("  " * depth + "Unknown node: %s, %s"
                       % (node.kind, node.displayname))
         except NotImplementedError as e:
-            warnings.warn(e.message + " Ignoring node '%s'" % node.displayname)
+            warnings.warn(str(e) + " Ignoring node '%s'" % node.displayname)
             parse_children = False
 
         if parse_children:
@@ -394,6 +635,23 @@ class Parser(object):
 
         self.namespace = namespace
 
+    def _add_type(self, tname):
+        self.includes.add_include_for(tname)
+        for shared_class in re.findall(r"\bshared_ptr\[([^\[\]]+)\]", tname):
+            if shared_class not in self.type_info.shared_classes:
+                self.type_info.shared_classes.append(shared_class)
+        # elements of vectors of classes are returned as views
+        for element in re.findall(r"\bvector\[([^\[\]]+)\]", tname):
+            if element not in self.type_info.view_classes:
+                self.type_info.view_classes.append(element)
+
+    def _add_view(self, member_name, tname):
+        config = self.type_info.config
+        if (config.is_reference_returned_as_view(self.last_type.name,
+                                                 member_name) and
+                tname not in self.type_info.view_classes):
+            self.type_info.view_classes.append(tname)
+
     def add_typedef(self, underlying_tname, tname):
         if underlying_tname == "struct " + tname:
             if self.unnamed_struct is None:
@@ -427,6 +685,30 @@ class Parser(object):
             self.add_class(name)
         return True
 
+    def add_struct_layout(self, node):
+        """Record the memory layout of plain structs of numbers."""
+        if (node.displayname == "" or not node.is_definition() or
+                not node.type.is_pod()):
+            return
+        fields = []
+        for child in node.get_children():
+            if child.kind != cindex.CursorKind.FIELD_DECL:
+                continue
+            tname = cythontype_from_cpptype(
+                child.type.get_canonical().spelling)
+            offset = node.type.get_offset(child.spelling)
+            if (tname not in STRUCT_FIELD_FORMATS or child.is_bitfield() or
+                    offset < 0 or offset % 8 != 0):
+                return
+            fields.append({"name": child.spelling, "tname": tname,
+                           "format": STRUCT_FIELD_FORMATS[tname],
+                           "offset": offset // 8,
+                           "public": child.access_specifier ==
+                           cindex.AccessSpecifier.PUBLIC})
+        if fields:
+            self.type_info.struct_layouts[node.displayname] = {
+                "fields": fields, "itemsize": node.type.get_size()}
+
     def add_enum(self, name, comment=""):
         if self.last_type is not None:
             namespace = "%s::%s" % (self.namespace, self.last_type.name)
@@ -441,20 +723,23 @@ class Parser(object):
     def add_template_type(self, template_type):
         self.last_template.template_types.append(template_type)
 
-    def add_function(self, name, tname, namespace, comment=""):
+    def add_function(self, name, tname, namespace, comment="",
+                     noexcept=False):
         tname = cythontype_from_cpptype(tname)
-        self.includes.add_include_for(tname)
+        self._add_type(tname)
         function = Function(
             self.include_file, namespace, name, tname, comment)
+        function.noexcept = noexcept
         self.ast.nodes.append(function)
         self.last_function = function
         return True
 
-    def add_template_function(self, name, tname, comment=""):
+    def add_template_function(self, name, tname, comment="", noexcept=False):
         tname = cythontype_from_cpptype(tname)
-        self.includes.add_include_for(tname)
+        self._add_type(tname)
         function = TemplateFunction(self.include_file, self.namespace, name,
                                     tname, comment)
+        function.noexcept = noexcept
         self.ast.nodes.append(function)
         self.last_function = function
         self.last_template = function
@@ -488,27 +773,54 @@ class Parser(object):
         self.last_function = constructor
         return True
 
-    def add_method(self, name, tname, comment=""):
+    def add_method(self, name, tname, comment="", noexcept=False):
+        returns_reference = is_lvalue_reference(tname)
+        returns_const_reference = is_const_lvalue_reference(tname)
         tname = cythontype_from_cpptype(tname)
-        self.includes.add_include_for(tname)
+        self._add_type(tname)
         method = Method(name, tname, self.last_type.name, comment)
+        method.returns_reference = returns_reference
+        method.returns_const_reference = returns_const_reference
+        method.noexcept = noexcept
+        # const references are copied, a view would allow modifications
+        if returns_reference and not returns_const_reference:
+            self._add_view(name, tname)
         self.last_type.nodes.append(method)
         self.last_function = method
         return True
 
-    def add_template_method(self, name, tname, comment=""):
+    def _iterator_value_type(self, node):
+        if (node.spelling not in ["begin", "end"] or
+                isinstance(self.last_type, TemplateClass) or
+                len(list(node.get_arguments())) > 0):
+            return None
+        value_type = self.type_info.config.iterator_value_type(
+            self.last_type.name)
+        if value_type is None:
+            value_type = iterator_value_type(node.result_type)
+        return value_type
+
+    def add_iterator_method(self, name, value_type):
+        tname = cythontype_from_cpptype(value_type)
+        self._add_type(tname)
+        self.last_type.iterator_methods.append(name)
+        self.last_type.iterator_value_type = tname
+        return False
+
+    def add_template_method(self, name, tname, comment="", noexcept=False):
         tname = cythontype_from_cpptype(tname)
-        self.includes.add_include_for(tname)
+        self._add_type(tname)
         method = TemplateMethod(name, tname, self.last_type.name, comment)
+        method.noexcept = noexcept
         self.last_type.nodes.append(method)
         self.last_function = method
         self.last_template = method
         return True
 
-    def add_param(self, name, tname):
+    def add_param(self, name, tname, const=False):
         tname = cythontype_from_cpptype(tname)
-        self.includes.add_include_for(tname)
-        param = Param(name, tname)
+        self._add_type(tname)
+        param = Param(name, tname, const)
         self.last_param = param
         if self.last_function is not None:
             self.last_function.nodes.append(param)
@@ -519,7 +831,8 @@ class Parser(object):
 
     def add_field(self, name, tname, comment=""):
         tname = cythontype_from_cpptype(tname)
-        self.includes.add_include_for(tname)
+        self._add_type(tname)
         field = Field(name, tname, self.last_type.name, comment)
+        self._add_view(name, tname)
         self.last_type.nodes.append(field)
         return False
@@ -76,7 +76,7 @@ class FunctionSpecializer(Specializer):
 
             for arg in general.nodes:
                 tipe = self._replace_specification(arg.tipe, spec)
-                specialized.nodes.append(Param(arg.name, tipe))
+                specialized.nodes.append(Param(arg.name, tipe, arg.const))
 
             specialized_functions.append(specialized)
         return specialized_functions
@@ -100,7 +100,7 @@ class MethodSpecializer(Specializer):
 
             for arg in general.nodes:
                 tipe = self._replace_specification(arg.tipe, spec)
-                specialized.nodes.append(Param(arg.name, tipe))
+                specialized.nodes.append(Param(arg.name, tipe, arg.const))
 
             specialized_methods.append(specialized)
         return specialized_methods
\ No newline at end of file
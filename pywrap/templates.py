@@ -40,13 +40,20 @@ template_method_decl = "%(result_type)s %(name)s[%(types)s](%(args)s)"
 constructor_decl = "%(class_name)s(%(args)s)"
 arg_decl = "%(tipe)s %(name)s"
 field_decl = "%(tipe)s %(name)s"
+wrapper_function_decl = "%(def_prefix)s %(name)s(%(args)s)"
 
 # member definitions
 ctor_default_def = """    def __init__(cpp.%(name)s self):
         self.thisptr = new cpp.%(name)s()"""
 fun_call = "cpp.%(name)s(%(call_args)s)"
 ctor_call = "self.thisptr = new cpp.%(class_name)s(%(call_args)s)"
+value_ctor_call = "self.thisptr[0] = cpp.%(class_name)s(%(call_args)s)"
 method_call = "self.thisptr.%(name)s(%(call_args)s)"
 setter_call = "self.thisptr.%(name)s = %(call_args)s"
 getter_call = "self.thisptr.%(name)s"
 catch_result = "%(cpp_type_decl)s result = %(call)s"
+nogil_call = """with nogil:
+    %(call)s"""
+nogil_catch_result = """%(cpp_type_decl)s result
+with nogil:
+    result = %(call)s"""
@@ -1,8 +1,143 @@
 from pywrap.defaultconfig import Config
-from nose.tools import assert_equal, assert_raises
+from nose.tools import (assert_equal, assert_raises, assert_true,
+                        assert_false, assert_is_none)
 
 
 def test_cpp_operator():
     config = Config()
     assert_equal(config.cpp_to_py_operator("operator()"), "__call__")
-    assert_raises(NotImplementedError, config.cpp_to_py_operator, "operator<<")
\ No newline at end of file
+    assert_raises(NotImplementedError, config.cpp_to_py_operator, "operator<<")
+
+
+def test_release_gil():
+    config = Config()
+    config.release_gil_in_function("myFunction")
+    config.release_gil_in_method("MyClassA", "myMethod")
+    config.release_gil_in_class("MyClassB")
+    assert_true(config.is_gil_released_in_function("myFunction"))
+    assert_false(config.is_gil_released_in_function("otherFunction"))
+    assert_true(config.is_gil_released_in_method("MyClassA", "myMethod"))
+    assert_false(config.is_gil_released_in_method("MyClassA", "otherMethod"))
+    assert_false(config.is_gil_released_in_class("MyClassA"))
+    assert_true(config.is_gil_released_in_method("MyClassB", "anyMethod"))
+    assert_true(config.is_gil_released_in_class("MyClassB"))
+
+
+def test_matrix_argument():
+    config = Config()
+    config.register_matrix_argument("A::fun", "data", order="F")
+    assert_equal(config.matrix_argument("A::fun", "data"), ("F", False))
+    assert_equal(config.matrix_argument("A::fun", "other"), None)
+    assert_raises(ValueError, config.register_matrix_argument, "fun", "data",
+                  order="K")
+
+
+def test_return_vector_as_array():
+    config = Config()
+    config.return_vector_as_array("fun")
+    assert_true(config.is_vector_returned_as_array("fun"))
+    assert_false(config.is_vector_returned_as_array("A::fun"))
+    config.vectors_as_arrays = True
+    assert_true(config.is_vector_returned_as_array("A::fun"))
+
+
+def test_return_container_as_view():
+    config = Config()
+    config.return_container_as_view("fun")
+    assert_true(config.is_container_returned_as_view("fun"))
+    assert_false(config.is_container_returned_as_view("A::fun"))
+    config.containers_as_views = True
+    assert_true(config.is_container_returned_as_view("A::fun"))
+
+
+def test_return_reference_as_view():
+    config = Config()
+    config.return_reference_as_view("A", "get")
+    assert_true(config.is_reference_returned_as_view("A", "get"))
+    assert_false(config.is_reference_returned_as_view("B", "get"))
+    config.references_as_views = True
+    assert_true(config.is_reference_returned_as_view("B", "get"))
+
+
+def test_string_policy():
+    config = Config()
+    assert_equal(config.string_policy_of("fun"), "bytes")
+    config.set_string_policy("fun", "buffer")
+    config.string_policy = "utf-8"
+    assert_equal(config.string_policy_of("fun"), "buffer")
+    assert_equal(config.string_policy_of("A::fun"), "utf-8")
+    assert_raises(ValueError, config.set_string_policy, "fun", "latin-1")
+
+
+def test_freelist_and_value_type():
+    config = Config()
+    config.set_freelist("Point", 32)
+    config.value_type("Point")
+    assert_equal(config.freelist("Point"), 32)
+    assert_equal(config.freelist("Matrix"), None)
+    assert_true(config.is_value_type("Point"))
+    assert_false(config.is_value_type("Matrix"))
+
+
+def test_noexcept():
+    config = Config()
+    config.declare_noexcept_function("fun")
+    config.declare_noexcept_method("A", "get")
+    assert_true(config.is_noexcept_function("fun"))
+    assert_false(config.is_noexcept_function("get"))
+    assert_true(config.is_noexcept_method("A", "get"))
+    assert_false(config.is_noexcept_method("B", "get"))
+
+
+def test_final_class_and_inline_method():
+    config = Config()
+    config.final_class("Point")
+    config.inline_method("Point", "norm")
+    assert_true(config.is_final_class("Point"))
+    assert_false(config.is_final_class("Matrix"))
+    assert_true(config.is_method_inline("Point", "norm"))
+    assert_false(config.is_method_inline("Point", "dot"))
+    config.classes_final = True
+    config.methods_inline = True
+    assert_true(config.is_final_class("Matrix"))
+    assert_true(config.is_method_inline("Point", "dot"))
+
+
+def test_positional_only():
+    config = Config()
+    config.positional_only("add")
+    config.positional_only("Point::dot")
+    assert_true(config.has_positional_only_arguments("add"))
+    assert_true(config.has_positional_only_arguments("Point::dot"))
+    assert_false(config.has_positional_only_arguments("Point::norm"))
+    config.positional_only_arguments = True
+    assert_true(config.has_positional_only_arguments("Point::norm"))
+
+
+def test_register_iterator():
+    config = Config()
+    config.register_iterator("Range", "int")
+    assert_equal(config.iterator_value_type("Range"), "int")
+    assert_is_none(config.iterator_value_type("Samples"))
+
+
+def test_register_buffer():
+    config = Config()
+    config.register_buffer("Image", "data", ["rows", "cols"], "float")
+    assert_equal(config.buffer("Image")["shape"], ["rows", "cols"])
+    config.register_buffer("Signal", "data", "size", "double", readonly=True)
+    assert_equal(config.buffer("Signal")["shape"], ["size"])
+    assert_true(config.buffer("Signal")["readonly"])
+    assert_equal(config.buffer("Other"), None)
+    assert_raises(ValueError, config.register_buffer, "Image", "data",
+                  "size", "float", order="K")
+
+
+def test_vectorize():
+    config = Config()
+    config.vectorize_function("fun")
+    config.vectorize_method("A", "method")
+    assert_true(config.is_function_vectorized("fun"))
+    assert_false(config.is_function_vectorized("method"))
+    assert_true(config.is_method_vectorized("A", "method"))
+    assert_false(config.is_method_vectorized("B", "method"))
@@ -1,6 +1,7 @@
 import os
 from pywrap.cython import make_cython_wrapper, load_config
 from pywrap.parser import TypeInfo
+from pywrap.testing import full_paths
 from nose.tools import (assert_raises_regexp, assert_false, assert_equal,
                         assert_is_not_none)
 
@@ -55,3 +56,9 @@ def test_underlying_type():
 def test_missing_incdir():
     assert_raises_regexp(ValueError, "Include directory", make_cython_wrapper,
                          "test.hpp", [], incdirs=["/doesnotexist"])
+
+
+def test_modulename_shadows_import():
+    assert_raises_regexp(ValueError, "would shadow the Python module 'enum'",
+                         make_cython_wrapper, full_paths("enums.hpp"), [],
+                         "enum")
@@ -1,12 +1,16 @@
+import os
 from pywrap.exporter import (MethodDefinition, SetterDefinition,
                              GetterDefinition, ConstructorDefinition,
-                             FunctionDefinition, CythonDeclarationExporter)
+                             FunctionDefinition, CythonDeclarationExporter,
+                             CythonImplementationExporter,
+                             UfuncDefinition, VectorizedMethodDefinition)
 from pywrap.ast import (Param, Function, Clazz, Constructor, Method,
                         Field, Enum, Typedef)
 from pywrap.parser import Includes, TypeInfo
 from pywrap.utils import lines
 from pywrap.defaultconfig import Config
-from nose.tools import assert_multi_line_equal
+from nose.tools import (assert_multi_line_equal, assert_equal, assert_true,
+                        assert_false, assert_in, assert_not_in)
 
 
 def test_simple_function_def():
@@ -20,18 +24,98 @@ def test_simple_function_def():
     )
 
 
+def test_inline_method_def():
+    config = Config()
+    config.inline_method("Testclass", "testfun")
+    method = MethodDefinition(
+        "Testclass", "", "testfun", [Param("a", "int")], Includes(),
+        "void", TypeInfo(), config).make()
+    assert_multi_line_equal(
+        method,
+        lines("cdef inline _testfun_impl(Testclass self, int a):",
+              "    cdef int cpp_a = a",
+              "    self.thisptr.testfun(cpp_a)",
+              "",
+              "def testfun(Testclass self, int a):",
+              "    return self._testfun_impl(a)")
+    )
+
+
+def test_positional_only_method_def():
+    config = Config()
+    config.positional_only("Testclass::testfun")
+    method = MethodDefinition(
+        "Testclass", "", "testfun", [Param("a", "double")], Includes(),
+        "void", TypeInfo(), config).make()
+    assert_multi_line_equal(
+        method,
+        lines("def testfun(Testclass self, double a, /):",
+              "    cdef double cpp_a = a",
+              "    self.thisptr.testfun(cpp_a)")
+    )
+
+
+def test_positional_only_without_arguments_is_cpdef():
+    config = Config()
+    config.positional_only_arguments = True
+    function = FunctionDefinition(
+        "testfun", "", [], Includes(), "void", TypeInfo(), config).make()
+    assert_multi_line_equal(
+        function,
+        lines("cpdef testfun():",
+              "    cpp.testfun()")
+    )
+
+
 def test_array_arg_function_def():
     method = MethodDefinition(
         "Testclass", "", "testfun", [Param("a", "double *"),
                                  Param("aSize", "unsigned int")],
-        Includes(), "void", TypeInfo({}), Config()).make()
+        Includes(), "void", TypeInfo(), Config()).make()
     assert_multi_line_equal(
         method,
-        lines("cpdef testfun(Testclass self, np.ndarray[double, ndim=1] a):",
-              "    self.thisptr.testfun(&a[0], a.shape[0])")
+        lines("cpdef testfun(Testclass self, double[::1] a):",
+              "    if a is None:",
+              "        raise TypeError(\"Argument 'a' must not be None\")",
+              "    cdef double * cpp_a = NULL",
+              "    if a.shape[0] > 0:",
+              "        cpp_a = &a[0]",
+              "    self.thisptr.testfun(cpp_a, a.shape[0])")
     )
 
 
+def test_const_array_arg_function_def():
+    function = FunctionDefinition(
+        "testfun", "", [Param("a", "double *", True), Param("n", "int")],
+        Includes(), "void", TypeInfo(), Config()).make()
+    assert_multi_line_equal(
+        function,
+        lines("cpdef testfun(const double[::1] a):",
+              "    if a is None:",
+              "        raise TypeError(\"Argument 'a' must not be None\")",
+              "    cdef double * cpp_a = NULL",
+              "    if a.shape[0] > 0:",
+              "        cpp_a = <double *> &a[0]",
+              "    cpp.testfun(cpp_a, a.shape[0])")
+    )
+
+
+def test_array_arg_with_configured_length_name():
+    config = Config()
+    config.add_array_length_name("n")
+    args = [Param("a", "int32_t *"), Param("n", "size_t")]
+    fun = FunctionDefinition("testfun", "", args, Includes(), "void",
+                             TypeInfo(config), config).make()
+    assert_multi_line_equal(
+        fun.split(os.linesep)[0], "cpdef testfun(int32_t[::1] a):")
+
+    args = [Param("a", "double *"), Param("offset", "int")]
+    fun = FunctionDefinition("testfun", "", args, Includes(), "void",
+                             TypeInfo(config), config).make()
+    assert_multi_line_equal(
+        fun.split(os.linesep)[0], "cpdef testfun(double a, int offset):")
+
+
 def test_setter_definition():
     field = Field("myField", "double", "MyClass")
     setter = SetterDefinition(
@@ -72,6 +156,20 @@ def test_default_ctor_def():
     )
 
 
+def test_value_type_ctor_def():
+    config = Config()
+    config.value_type("MyClass")
+    ctor = ConstructorDefinition("MyClass", "", [], Includes(),
+                                 TypeInfo(config), config, "MyClass").make()
+    assert_multi_line_equal(
+        ctor,
+        lines(
+            "def __init__(MyClass self):",
+            "    self.thisptr[0] = cpp.MyClass()"
+        )
+    )
+
+
 def test_function_def():
     fun = FunctionDefinition("myFun", "", [], Includes(), "void", TypeInfo(),
                              Config()).make()
@@ -114,6 +212,64 @@ def test_function_decl():
     )
 
 
+def test_function_returns_object_decl():
+    type_info = TypeInfo()
+    type_info.classes.append("MyClass")
+    includes = Includes()
+    exporter = CythonDeclarationExporter(includes, Config(), type_info)
+    exporter.visit_function(Function("test.hpp", "", "myFun", "MyClass"))
+    exporter.visit_ast(None)
+    assert_in("    _Result[MyClass] myFun() except +", exporter.export())
+    assert_true(includes.result)
+
+
+def test_function_returns_object_def():
+    type_info = TypeInfo()
+    type_info.classes.append("MyClass")
+    fun = FunctionDefinition("myFun", "", [], Includes(), "MyClass",
+                             type_info, Config()).make()
+    assert_multi_line_equal(
+        fun,
+        lines("cpdef my_fun():",
+              "    cdef cpp._Result[cpp.MyClass] result = cpp.myFun()",
+              "    cdef MyClass ret = MyClass.__new__(MyClass)",
+              "    ret.thisptr = result.release()",
+              "    return ret")
+    )
+
+
+def test_function_returns_value_type_def():
+    config = Config()
+    config.value_type("MyClass")
+    type_info = TypeInfo(config)
+    type_info.classes.append("MyClass")
+    fun = FunctionDefinition("myFun", "", [], Includes(), "MyClass",
+                             type_info, config).make()
+    assert_in("    cdef cpp.MyClass result = cpp.myFun()", fun)
+    assert_in("    ret.thisptr[0] = result", fun)
+
+
+def test_function_returns_shared_ptr_def():
+    type_info = TypeInfo(Config())
+    type_info.classes.append("MyClass")
+    fun = FunctionDefinition("myFun", "", [], Includes(),
+                             "shared_ptr[MyClass]", type_info, Config()).make()
+    assert_in("    cdef shared_ptr[cpp.MyClass] result = cpp.myFun()", fun)
+    assert_in("    ret.thisshared.swap(result)", fun)
+    assert_in("    ret.delete_thisptr = False", fun)
+
+
+def test_function_shares_argument_def():
+    type_info = TypeInfo(Config())
+    type_info.classes.append("MyClass")
+    fun = FunctionDefinition(
+        "myFun", "", [Param("a", "shared_ptr[MyClass]")], Includes(), "void",
+        type_info, Config()).make()
+    assert_in("cpdef my_fun(MyClass a):", fun)
+    assert_in("        cpp_a = a._shared()", fun)
+    assert_in("    cpp.myFun(cpp_a)", fun)
+
+
 def test_class_decl():
     clazz = Clazz("test.hpp", "", "MyClass")
     exporter = CythonDeclarationExporter(Includes(), Config())
@@ -213,6 +369,30 @@ def test_enum_decl():
     )
 
 
+def test_enum_def():
+    enum = Enum("test.hpp", "", "MyEnum")
+    enum.constants.append("one")
+    enum.constants.append("two")
+    includes = Includes()
+    exporter = CythonImplementationExporter(includes)
+    exporter.visit_enum(enum)
+    exporter.visit_ast(None)
+    definition = exporter.export()
+    assert_in("class MyEnum(IntEnum):", definition)
+    assert_in("    two = cpp.two", definition)
+    assert_in("cdef object _MyEnum_from_cpp(int value):", definition)
+    assert_equal(includes.imports["enum"], set(["IntEnum"]))
+
+
+def test_function_returns_enum_def():
+    type_info = TypeInfo()
+    type_info.enums.append("MyEnum")
+    fun = FunctionDefinition("myFun", "", [], Includes(), "MyEnum",
+                             type_info, Config()).make()
+    assert_in("    cdef cpp.MyEnum result = cpp.myFun()", fun)
+    assert_in("    return _MyEnum_from_cpp(result)", fun)
+
+
 def test_typedef_decl():
     typedef = Typedef("test.hpp", "", "MyType", "double")
     exporter = CythonDeclarationExporter(Includes(), Config())
@@ -226,3 +406,299 @@ def test_typedef_decl():
             "    ctypedef double MyType"
         )
     )
+
+
+def test_nogil_method_def():
+    method = MethodDefinition(
+        "MyClass", "", "myMethod", [Param("a", "double")], Includes(),
+        "double", TypeInfo({}), Config(), nogil=True).make()
+    assert_multi_line_equal(
+        method,
+        lines("cpdef my_method(MyClass self, double a):",
+              "    cdef double cpp_a = a",
+              "    cdef double result",
+              "    with nogil:",
+              "        result = self.thisptr.myMethod(cpp_a)",
+              "    return result",
+              "")
+    )
+
+
+def test_nogil_ctor_def():
+    ctor = ConstructorDefinition("MyClass", "", [], Includes(), TypeInfo(),
+                                 Config(), "MyClass", nogil=True).make()
+    assert_multi_line_equal(
+        ctor,
+        lines(
+            "def __init__(MyClass self):",
+            "    with nogil:",
+            "        self.thisptr = new cpp.MyClass()"
+        )
+    )
+
+
+def test_noexcept_decl():
+    config = Config()
+    config.declare_noexcept_method("MyClass", "size")
+    fun = Function("test.hpp", "", "myFun", "void")
+    fun.noexcept = True
+    method = Method("get", "int", "MyClass")
+    method.noexcept = True
+    exporter = CythonDeclarationExporter(Includes(), config)
+    exporter.visit_function(fun)
+    exporter.visit_method(method)
+    exporter.visit_method(Method("size", "int", "MyClass"))
+    exporter.visit_method(Method("set", "void", "MyClass"))
+    assert_equal(exporter.functions,
+                 ["cdef extern from \"test.hpp\" namespace \"\":\n"
+                  "    void myFun()"])
+    assert_equal(exporter.methods, ["int get()", "int size()",
+                                    "void set() except +"])
+
+
+def test_nogil_decl():
+    config = Config()
+    config.release_gil_in_function("myFun")
+    config.release_gil_in_class("MyClass")
+    clazz = Clazz("test.hpp", "", "MyClass")
+    exporter = CythonDeclarationExporter(Includes(), config)
+    exporter.visit_function(Function("test.hpp", "", "myFun", "void"))
+    exporter.visit_constructor(Constructor("MyClass"))
+    exporter.visit_method(Method("myMethod", "void", "MyClass"))
+    exporter.visit_clazz(clazz)
+    exporter.visit_ast(None)
+    decl = exporter.export()
+    assert_multi_line_equal(
+        decl.strip(),
+        lines(
+            "cdef extern from \"test.hpp\" namespace \"\":",
+            "    void myFun() except + nogil",
+            "",
+            "",
+            "",
+            "cdef extern from \"test.hpp\" namespace \"\":",
+            "    cdef cppclass MyClass:",
+            "        MyClass() nogil",
+            "        void myMethod() except + nogil"
+        )
+    )
+
+
+def test_matrix_arg_function_def():
+    config = Config()
+    config.register_matrix_argument("testfun", "data", order="F",
+                                    leading_dimension=True)
+    args = [Param("data", "double *", True), Param("rows", "int"),
+            Param("cols", "int"), Param("ld", "int")]
+    includes = Includes()
+    fun = FunctionDefinition("testfun", "", args, includes, "void",
+                             TypeInfo(config), config).make()
+    assert_true(includes.matrix)
+    fun_lines = fun.split(os.linesep)
+    assert_equal(fun_lines[0], "cpdef testfun(const double[:, :] data):")
+    assert_in("        data = data.copy_fortran()", fun_lines)
+    assert_in("        cpp_data = <double *> &data[0, 0]", fun_lines)
+    assert_in("    cdef Py_ssize_t cpp_data_ld = data.shape[0]", fun_lines)
+    assert_equal(
+        fun_lines[-1],
+        "    cpp.testfun(cpp_data, data.shape[0], data.shape[1], cpp_data_ld)")
+
+    args[0] = Param("data", "double *")
+    fun = FunctionDefinition("testfun", "", args, Includes(), "void",
+                             TypeInfo(config), config).make()
+    fun_lines = fun.split(os.linesep)
+    assert_equal(fun_lines[0], "cpdef testfun(double[:, :] data):")
+    assert_not_in("        data = data.copy_fortran()", fun_lines)
+    assert_true(fun_lines[4].startswith("        raise ValueError("))
+
+
+def test_vector_returned_as_array():
+    config = Config()
+    config.return_vector_as_array("testfun")
+    includes = Includes()
+    fun = FunctionDefinition("testfun", "", [], includes, "vector[double]",
+                             TypeInfo(config), config).make()
+    assert_true(includes.numpy)
+    assert_in("_VectorOwner_double", includes.vector_owners)
+    fun_lines = fun.split(os.linesep)
+    assert_equal(fun_lines[-2], "    result_owner.data.swap(result)")
+    assert_equal(fun_lines[-1], "    return np.asarray(result_owner)")
+
+
+def test_container_returned_as_view():
+    config = Config()
+    config.return_container_as_view("testfun")
+    includes = Includes()
+    fun = FunctionDefinition("testfun", "", [], includes, "map[string, int]",
+                             TypeInfo(config), config).make()
+    assert_equal(includes.container_views,
+                 {"_MapView_string_int": ("string", "int")})
+    assert_in("Mapping", includes.imports["collections.abc"])
+    fun_lines = fun.split(os.linesep)
+    assert_equal(fun_lines[-2], "    result_view.data.swap(result)")
+    assert_equal(fun_lines[-1], "    return result_view")
+
+
+def test_reference_returned_as_view():
+    config = Config()
+    config.return_reference_as_view("MyClass", "get")
+    type_info = TypeInfo(config)
+    type_info.classes.extend(["MyClass", "Inner"])
+    type_info.view_classes.append("Inner")
+    method = Method("get", "Inner", "MyClass")
+    method.returns_reference = True
+
+    exporter = CythonDeclarationExporter(Includes(), config, type_info)
+    exporter.visit_method(method)
+    assert_equal(exporter.methods, ["Inner& get() except +"])
+
+    exporter = CythonImplementationExporter(Includes(), type_info, config)
+    exporter.visit_method(method)
+    exporter.visit_clazz(Clazz("test.hpp", "", "MyClass"))
+    class_def = exporter.classes[0]
+    assert_in("        cdef cpp.Inner * result = &self.thisptr.get()",
+              class_def)
+    assert_in("        ret.owner = self", class_def)
+
+
+def test_const_reference_is_copied():
+    config = Config()
+    config.return_reference_as_view("MyClass", "get")
+    type_info = TypeInfo(config)
+    type_info.classes.extend(["MyClass", "Inner"])
+    type_info.view_classes.append("Inner")
+    method = Method("get", "Inner", "MyClass")
+    method.returns_reference = True
+    method.returns_const_reference = True
+
+    exporter = CythonDeclarationExporter(Includes(), config, type_info)
+    exporter.visit_method(method)
+    assert_equal(exporter.methods, ["_Result[Inner] get() except +"])
+
+    exporter = CythonImplementationExporter(Includes(), type_info, config)
+    exporter.visit_method(method)
+    exporter.visit_clazz(Clazz("test.hpp", "", "MyClass"))
+    class_def = exporter.classes[0]
+    assert_not_in("ret.owner = self", class_def)
+
+
+def test_readonly_buffer_decl():
+    config = Config()
+    config.register_buffer("MyClass", "data", "size", "double", readonly=True)
+    clazz = Clazz("test.hpp", "", "MyClass")
+    exporter = CythonDeclarationExporter(Includes(), config)
+    exporter.visit_method(Method("data", "double *", "MyClass"))
+    exporter.visit_clazz(clazz)
+    exporter.visit_ast(None)
+    decl = exporter.export()
+    assert_multi_line_equal(
+        decl.strip(),
+        lines(
+            "cdef extern from \"test.hpp\" namespace \"\":",
+            "    cdef cppclass MyClass:",
+            "        const double * data() except +"
+        )
+    )
+
+
+def test_ufunc_def():
+    args = [Param("a", "double"), Param("b", "double")]
+    includes = Includes()
+    ufunc = UfuncDefinition("testFun", args, includes, "double", TypeInfo())
+    assert_true(ufunc.supported())
+    code = ufunc.make()
+    assert_true(includes.ufunc)
+    code_lines = code.split(os.linesep)
+    assert_in("        (<double *> out)[0] = cpp.testFun("
+              "(<double *> in0)[0], (<double *> in1)[0])", code_lines)
+    assert_in("test_fun_vec = np.PyUFunc_FromFuncAndData(", code)
+    assert_true(code_lines[0].endswith(" except * nogil:"))
+
+
+def test_ufunc_def_of_static_noexcept_method():
+    args = [Param("a", "double")]
+    ufunc = UfuncDefinition("testFun", args, Includes(), "double", TypeInfo(),
+                            noexcept=True, class_name="MyClass")
+    code = ufunc.make()
+    assert_true(code.split(os.linesep)[0].endswith(" noexcept nogil:"))
+    assert_in("my_class_test_fun_vec = np.PyUFunc_FromFuncAndData(", code)
+
+
+def test_ufunc_requires_numbers():
+    args = [Param("a", "vector[double]")]
+    ufunc = UfuncDefinition("testFun", args, Includes(), "double", TypeInfo())
+    assert_false(ufunc.supported())
+    ufunc = UfuncDefinition("testFun", [], Includes(), "double", TypeInfo())
+    assert_false(ufunc.supported())
+
+
+def test_vectorized_method_def():
+    args = [Param("x", "float")]
+    method = VectorizedMethodDefinition(
+        "MyClass", "testFun", args, Includes(), "double", TypeInfo()).make()
+    method_lines = method.split(os.linesep)
+    assert_equal(method_lines[2],
+                 "def test_fun_vec(MyClass self, float[:] x not None):")
+    assert_in("    cdef double[::1] result = np.empty(n, dtype=\"d\")",
+              method_lines)
+    assert_in("            result[i] = self.thisptr.testFun(x[i])",
+              method_lines)
+
+
+def test_cimportable_declarations():
+    config = Config()
+    config.cimportable = True
+    config.inline_method("MyClass", "get")
+    type_info = TypeInfo(config)
+    type_info.classes.append("MyClass")
+
+    exporter = CythonImplementationExporter(Includes(), type_info, config)
+    exporter.visit_function(Function("test.hpp", "", "myFun", "void"))
+    method = Method("set", "void", "MyClass")
+    method.nodes.append(Param("value", "int"))
+    exporter.visit_method(method)
+    exporter.visit_method(Method("get", "int", "MyClass"))
+    exporter.visit_clazz(Clazz("test.hpp", "", "MyClass"))
+    exporter.visit_ast(None)
+
+    assert_false("cdef cpp.MyClass * thisptr" in exporter.export())
+    assert_multi_line_equal(
+        exporter.export_declarations().strip(),
+        lines("cdef class MyClass",
+              "",
+              "cpdef my_fun()",
+              "",
+              "",
+              "cdef class MyClass:",
+              "    cdef cpp.MyClass * thisptr",
+              "    cdef bool delete_thisptr",
+              "    cpdef set(MyClass self, int value)",
+              "    cdef _get_impl(MyClass self)")
+    )
+
+
+def test_iterable_class():
+    clazz = Clazz("test.hpp", "ns", "Series")
+    clazz.iterator_methods.extend(["begin", "end"])
+    clazz.iterator_value_type = "double"
+
+    exporter = CythonDeclarationExporter(Includes())
+    exporter.visit_clazz(clazz)
+    exporter.visit_ast(None)
+    declarations = exporter.export()
+    assert_in("    cdef cppclass Series_iterator "
+              "\"decltype(std::declval<ns::Series&>().begin())\":",
+              declarations)
+    assert_in("        double& operator*()", declarations)
+    assert_in("        Series_iterator begin()", declarations)
+
+    includes = Includes()
+    exporter = CythonImplementationExporter(includes)
+    exporter.visit_clazz(clazz)
+    exporter.visit_ast(None)
+    definitions = exporter.export()
+    assert_in("cdef inline _Series_iterator_value(cpp.Series_iterator it):",
+              definitions)
+    assert_in("    def __iter__(self):", definitions)
+    assert_in("            yield _Series_iterator_value(it)", definitions)
+    assert_equal(includes.cimports["cython.operator"], set(["preincrement"]))
@@ -1,8 +1,9 @@
 import os
 import tempfile
-from pywrap.parser import Parser, Includes, ClangError
+from pywrap.parser import Parser, Includes, TypeInfo, ClangError
 from nose.tools import (assert_true, assert_equal, assert_is_not_none,
-                        assert_is_none, assert_raises_regexp)
+                        assert_is_none, assert_raises_regexp, assert_in,
+                        assert_not_in, assert_false)
 from pywrap.testing import assert_warns_message
 
 
@@ -19,6 +20,15 @@ def test_include_map():
     assert_true(inc.stl["string"])
 
 
+def test_include_stdint():
+    inc = Includes()
+    inc.add_include_for("uint8_t *")
+    inc.add_include_for("vector[int32_t]")
+    assert_equal(inc.stdint, set(["uint8_t", "int32_t"]))
+    assert_true(inc.declarations_import().endswith(
+        "from libc.stdint cimport int32_t, uint8_t" + os.linesep))
+
+
 def test_add_typedef():
     parser = Parser("test.hpp")
     parser.init_ast()
@@ -174,6 +184,141 @@ void function2() {}
     assert_equal(len(ast.nodes), 3 + 2 + 1 + 1)
 
 
+def test_struct_layout():
+    testcode = """
+struct Record
+{
+    short s;
+    double d;
+    bool b;
+};
+
+struct NoRecord
+{
+    int* i;
+};
+"""
+
+    _, filename = tempfile.mkstemp(".hpp")
+    with open(filename, "w") as f:
+        f.write(testcode)
+
+    try:
+        type_info = TypeInfo()
+        parser = Parser(filename, type_info=type_info)
+        parser.parse()
+    finally:
+        if os.path.exists(filename):
+            os.remove(filename)
+
+    assert_not_in("NoRecord", type_info.struct_layouts)
+    layout = type_info.struct_layouts["Record"]
+    assert_equal(layout["itemsize"], 24)
+    assert_equal([(field["name"], field["format"], field["offset"])
+                  for field in layout["fields"]],
+                 [("s", "h", 0), ("d", "d", 8), ("b", "?", 16)])
+
+
+def test_exception_specification():
+    testcode = """
+void mayThrow() {}
+void noThrow() noexcept {}
+void oldNoThrow() throw() {}
+
+class A
+{
+public:
+    int get() const noexcept { return 0; }
+    int set() { return 0; }
+};
+"""
+
+    _, filename = tempfile.mkstemp(".hpp")
+    with open(filename, "w") as f:
+        f.write(testcode)
+
+    try:
+        parser = Parser(filename, type_info=TypeInfo())
+        ast = parser.parse()
+    finally:
+        if os.path.exists(filename):
+            os.remove(filename)
+
+    assert_equal([node.noexcept for node in ast.nodes[:3]],
+                 [False, True, True])
+    assert_equal([method.noexcept for method in ast.nodes[3].nodes],
+                 [True, False])
+
+
+def test_const_params():
+    testcode = """
+void fun(const char* a, char* b, char const* c, const int& d, double e) {}
+"""
+
+    _, filename = tempfile.mkstemp(".hpp")
+    with open(filename, "w") as f:
+        f.write(testcode)
+
+    try:
+        parser = Parser(filename, type_info=TypeInfo())
+        ast = parser.parse()
+    finally:
+        if os.path.exists(filename):
+            os.remove(filename)
+
+    assert_equal([param.const for param in ast.nodes[0].nodes],
+                 [True, False, True, True, False])
+
+
+def test_iterable_classes():
+    testcode = """
+#include <map>
+#include <vector>
+
+class Samples
+{
+    double* data;
+public:
+    const double* begin() const { return data; }
+    const double* end() const { return data; }
+};
+
+class Table
+{
+    std::map<int, double> m;
+public:
+    typedef std::map<int, double>::iterator iterator;
+    iterator begin() { return m.begin(); }
+    iterator end() { return m.end(); }
+};
+
+class Interval
+{
+public:
+    int begin() const { return 0; }
+};
+"""
+
+    _, filename = tempfile.mkstemp(".hpp")
+    with open(filename, "w") as f:
+        f.write(testcode)
+
+    try:
+        parser = Parser(filename, type_info=TypeInfo())
+        ast = parser.parse()
+    finally:
+        if os.path.exists(filename):
+            os.remove(filename)
+
+    samples, table, interval = ast.nodes
+    assert_true(samples.is_iterable())
+    assert_equal(samples.iterator_value_type, "double")
+    assert_true(table.is_iterable())
+    assert_equal(table.iterator_value_type, "pair[int, double]")
+    assert_false(interval.is_iterable())
+    assert_equal(interval.nodes[0].name, "begin")
+
+
 def test_error():
     testcode = """
 int function
@@ -193,3 +338,11 @@ int function
     finally:
         if os.path.exists(filename):
             os.remove(filename)
+
+
+def test_include_std_array():
+    inc = Includes()
+    inc.add_std_array("array_double_3", "double", 3)
+    assert_in("    cdef cppclass array_double_3 \"std::array<double, 3>\":",
+              inc.declarations_import().split(os.linesep))
+    assert_not_in("array_double_3", inc.implementations_import())
@@ -41,6 +41,21 @@ def test_function_specializer():
     assert_equal(functions[1].nodes[0].tipe, "double")
 
 
+def test_function_specializer_keeps_const():
+    config = Config()
+    config.register_function_specialization("countChars", "countChars",
+                                            {"T": "int"})
+    specializer = FunctionSpecializer(config)
+
+    template = TemplateFunction("test.hpp", "", "countChars", "T")
+    template.nodes.append(Param("data", "char *", True))
+    template.nodes.append(Param("size", "T"))
+    template.template_types.append("T")
+
+    function = specializer.specialize(template)[0]
+    assert_equal([param.const for param in function.nodes], [True, False])
+
+
 def test_class_specializer():
     config = Config()
     config.register_class_specialization("MyClass", "MyClassDouble",
@@ -75,3 +90,18 @@ def test_method_specialization():
     assert_equal(method.result_type, "bool")
     assert_equal(len(method.nodes), 1)
     assert_equal(method.nodes[0].tipe, "bool")
+
+
+def test_method_specializer_keeps_const():
+    config = Config()
+    config.register_method_specialization("MyClass", "sum", "sum_double",
+                                          {"T": "double"})
+    specializer = MethodSpecializer(config)
+
+    template = TemplateMethod("sum", "T", "MyClass")
+    template.nodes.append(Param("data", "T *", True))
+    template.nodes.append(Param("n", "int"))
+    template.template_types.append("T")
+
+    method = specializer.specialize(template)[0]
+    assert_equal([param.const for param in method.nodes], [True, False])
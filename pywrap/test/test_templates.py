@@ -1,6 +1,36 @@
 from pywrap.templates import render
-from nose.tools import assert_raises
+from nose.tools import assert_raises, assert_in
 
 
 def test_render_fails():
     assert_raises(IOError, render, "no_template_with_this_name")
+
+
+def test_render_class_with_buffer():
+    buffer_def = {"data": "data", "shape": ["rows", "cols"],
+                  "element_type": "float", "order": "F", "readonly": False,
+                  "format": "f", "kind": "f"}
+    code = render("class", name="Matrix", cppname="Matrix", comment="",
+                  buffer=buffer_def)
+    assert_in("        cdef Py_ssize_t * strides = shape + 2", code)
+    assert_in("        strides[0] = sizeof(float)", code)
+    assert_in("        strides[1] = strides[0] * shape[0]", code)
+    assert_in("            buffer.buf = <char *> self.thisptr.data()", code)
+    assert_in("        buffer.internal = shape", code)
+    assert_in("        buffer.readonly = 0", code)
+    assert_in("        free(buffer.internal)", code)
+
+
+def test_render_final_class():
+    code = render("class", name="Point", cppname="Point", comment="",
+                  final=True)
+    assert_in("@cython.final\ncdef class Point:", code)
+
+
+def test_render_value_type_with_freelist():
+    code = render("class", name="Point", cppname="Point", comment="",
+                  freelist=16, value_type=True)
+    assert_in("@cython.freelist(16)\ncdef class Point:", code)
+    assert_in("    cdef cpp.Point thisvalue", code)
+    assert_in("        self.thisptr = &self.thisvalue", code)
+    assert_in("                self.thisptr != &self.thisvalue):", code)
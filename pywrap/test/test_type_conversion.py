@@ -1,5 +1,6 @@
-from pywrap.parser import TypeInfo
+from pywrap.parser import TypeInfo, Includes
 from pywrap.defaultconfig import Config
+from pywrap.ast import Param
 from pywrap.type_conversion import (
     cythontype_from_cpptype, find_all_subtypes, create_type_converter,
     is_stl_type_with_automatic_conversion, typedef_prefix)
@@ -94,3 +95,136 @@ def test_find_subtypes_of_complex_hierarchy():
 def test_converter_not_available():
     assert_raises(NotImplementedError, create_type_converter,
                   "UnknownType", "unknownType", TypeInfo([]), Config())
+
+
+def test_std_array():
+    assert_equal(cythontype_from_cpptype("const std::array<double, 3> &"),
+                 "array_double_3")
+    assert_equal(cythontype_from_cpptype("std::array<unsigned int, 4>"),
+                 "array_unsigned__int_4")
+
+
+def test_fixed_size_array_from_buffer():
+    includes = Includes()
+    converter = create_type_converter("double[16]", "m", TypeInfo(), Config())
+    converter.add_includes(includes)
+    conversion = converter.python_to_cpp()
+    assert_in("memcpy(cpp_m, &m_buffer[0], 16 * sizeof(double))", conversion)
+    assert_in("memcpy", includes.cimports["libc.string"])
+    assert_equal(converter.python_type_decl(), "object m")
+
+
+def test_return_fixed_size_array():
+    config = Config()
+    converter = create_type_converter(
+        "array_float_4", None, TypeInfo(config=config), config)
+    assert_equal(converter.cpp_type_decl(), "cdef cpp.array_float_4")
+    assert_in("tuple", converter.return_output())
+    config.fixed_size_arrays_as_ndarrays = True
+    assert_in("np.PyArray_DATA(result_array), result.data()",
+              converter.return_output())
+
+
+def test_numeric_vector_from_buffer():
+    includes = Includes()
+    converter = create_type_converter(
+        "vector[double]", "v", TypeInfo(), Config())
+    converter.add_includes(includes)
+    conversion = converter.python_to_cpp()
+    assert_in("cdef const double[::1] v_buffer = None", conversion)
+    assert_in("    cpp_v = v", conversion)
+    assert_in("PyObject_CheckBuffer", includes.cimports["cpython.buffer"])
+
+
+def test_string_policies():
+    config = Config()
+    type_info = TypeInfo(config)
+    converter = create_type_converter("string", "s", type_info, config)
+    assert_equal(converter.python_to_cpp(), "cdef string cpp_s = s")
+    config.string_policy = "utf-8"
+    includes = Includes()
+    converter.add_includes(includes)
+    assert_equal(converter.python_type_decl(), "object s")
+    assert_in("s_data = PyUnicode_AsUTF8AndSize(s, &s_size)",
+              converter.python_to_cpp())
+    assert_in("cpp_s.assign(s_data, s_size)", converter.python_to_cpp())
+    assert_in("PyUnicode_AsUTF8AndSize", includes.cimports["cpython.unicode"])
+    output_converter = create_type_converter("string", None, type_info, config)
+    assert_equal(output_converter.return_output(),
+                 "return result.decode(\"utf-8\")")
+    config.string_policy = "buffer"
+    output_converter.add_includes(includes)
+    assert_true(includes.string_owner)
+    assert_in("return memoryview(result_owner)",
+              output_converter.return_output())
+
+
+def test_char_array_from_buffer():
+    config = Config()
+    type_info = TypeInfo(config)
+    args = [Param("data", "char *"), Param("size", "size_t")]
+    converter = create_type_converter(
+        "char *", "data", type_info, config, (args, 0, "fun"))
+    assert_equal(converter.n_cpp_args(), 2)
+    assert_equal(converter.cpp_call_args(), ["<char *> data_data", "data_size"])
+    assert_in("data_buffer = memoryview(data).cast(\"B\")",
+              converter.python_to_cpp())
+
+
+def test_map_from_dict():
+    includes = Includes()
+    converter = create_type_converter(
+        "map[string, double]", "m", TypeInfo(), Config())
+    converter.add_includes(includes)
+    conversion = converter.python_to_cpp()
+    assert_in("if type(m) is dict:", conversion)
+    assert_in("    cpp_m = m", conversion)
+    assert_in("PyDict_Next", includes.cimports["cpython.dict"])
+    converter = create_type_converter(
+        "map[string, vector[double]]", "m", TypeInfo(), Config())
+    assert_equal(converter.python_to_cpp(),
+                 "cdef map[string, vector[double]] cpp_m = m")
+
+
+def test_vector_of_class():
+    type_info = TypeInfo()
+    type_info.classes.append("MyClass")
+    includes = Includes()
+    converter = create_type_converter(
+        "vector[MyClass]", "v", type_info, Config())
+    converter.add_includes(includes)
+    assert_in("cpp_v.reserve(PyObject_LengthHint(v, 0))",
+              converter.python_to_cpp())
+    output_converter = create_type_converter(
+        "vector[MyClass]", None, type_info, Config())
+    output_converter.add_includes(includes)
+    assert_in("result_view.data.swap(result)",
+              output_converter.return_output())
+    assert_equal(includes.vector_views, {"_VectorView_MyClass": "MyClass"})
+
+
+def test_vector_of_struct_as_structured_array():
+    config = Config()
+    config.return_vector_as_array("fun")
+    type_info = TypeInfo(config)
+    type_info.classes.append("MyStruct")
+    type_info.struct_layouts["MyStruct"] = {
+        "fields": [{"name": "a", "tname": "int", "format": "i", "offset": 0,
+                    "public": True},
+                   {"name": "b", "tname": "bool", "format": "?",
+                    "offset": 4, "public": True}],
+        "itemsize": 8}
+    includes = Includes()
+    converter = create_type_converter(
+        "vector[MyStruct]", "v", type_info, config, ([], 0, "fun"))
+    converter.add_includes(includes)
+    assert_in("    memcpy(cpp_v.data(), np.PyArray_DATA(v_array),",
+              converter.python_to_cpp())
+    output_converter = create_type_converter(
+        "vector[MyStruct]", None, type_info, config, ([], None, "fun"))
+    output_converter.add_includes(includes)
+    assert_in("return np.frombuffer(result_owner, dtype=MyStruct_dtype)",
+              output_converter.return_output())
+    assert_equal(includes.vector_owners["_VectorOwner_MyStruct"],
+                 ("cpp.MyStruct", "T{i:a:?:b:xxx}"))
+    assert_in("MyStruct_dtype = np.dtype({", includes.implementations_import())
@@ -1,15 +1,46 @@
 import os
 import re
+import struct
 from abc import ABCMeta, abstractmethod
 from .utils import lines, replace_keyword_argnames
 from .templates import render
 
 
+STDINT_TYPES = ["int8_t", "int16_t", "int32_t", "int64_t",
+                "uint8_t", "uint16_t", "uint32_t", "uint64_t"]
+NUMERIC_TYPES = ["char", "signed char", "unsigned char", "short",
+                 "unsigned short", "int", "unsigned int", "long",
+                 "unsigned long", "long long", "unsigned long long", "size_t",
+                 "float", "double"] + STDINT_TYPES
+# format characters of the buffer protocol (see module struct)
+BUFFER_FORMATS = {
+    "signed char": "b", "unsigned char": "B", "short": "h",
+    "unsigned short": "H", "int": "i", "unsigned int": "I", "long": "l",
+    "unsigned long": "L", "long long": "q", "unsigned long long": "Q",
+    "float": "f", "double": "d", "int8_t": "b", "uint8_t": "B",
+    "int16_t": "h", "uint16_t": "H", "int32_t": "i", "uint32_t": "I",
+    "int64_t": "q", "uint64_t": "Q"}
+# fields of structs that can be converted to NumPy structured arrays
+STRUCT_FIELD_FORMATS = dict(BUFFER_FORMATS, bool="?")
+# type numbers of NumPy
+NUMPY_TYPES = {
+    "signed char": "NPY_BYTE", "unsigned char": "NPY_UBYTE",
+    "short": "NPY_SHORT", "unsigned short": "NPY_USHORT", "int": "NPY_INT",
+    "unsigned int": "NPY_UINT", "long": "NPY_LONG",
+    "unsigned long": "NPY_ULONG", "long long": "NPY_LONGLONG",
+    "unsigned long long": "NPY_ULONGLONG", "float": "NPY_FLOAT",
+    "double": "NPY_DOUBLE", "int8_t": "NPY_INT8", "uint8_t": "NPY_UINT8",
+    "int16_t": "NPY_INT16", "uint16_t": "NPY_UINT16", "int32_t": "NPY_INT32",
+    "uint32_t": "NPY_UINT32", "int64_t": "NPY_INT64",
+    "uint64_t": "NPY_UINT64"}
+
+
 def is_basic_type_with_automatic_conversion(typename):
     # source: http://docs.cython.org/src/userguide/wrapping_CPlusPlus.html#standard-library
     return typename in ["bool", "string", "char *",
                         "int", "unsigned int", "long", "unsigned long",
-                        "float", "double"]
+                        "long long", "unsigned long long", "size_t",
+                        "float", "double"] + STDINT_TYPES
 
 
 def is_stl_type_with_automatic_conversion(typename):
@@ -27,9 +58,21 @@ def cythontype_from_cpptype(tname):
     cython_tname = _remove_reference_modifier(cython_tname)
     cython_tname = _remove_namespace(cython_tname)
     cython_tname = _replace_angle_brackets(cython_tname)
+    cython_tname = _replace_std_array(cython_tname)
     return cython_tname
 
 
+def is_lvalue_reference(tname):
+    """Is the C++ type an lvalue reference?"""
+    tname = tname.strip()
+    return tname.endswith("&") and not tname.endswith("&&")
+
+
+def is_const_lvalue_reference(tname):
+    """Is the C++ type an lvalue reference to a const object?"""
+    return is_lvalue_reference(tname) and tname.strip().startswith("const ")
+
+
 def _remove_const_modifier(tname):
     return tname.replace("const ", "").replace("*const", "*").strip()
 
@@ -62,6 +105,15 @@ def _replace_angle_brackets(tname):
     return tname.replace("<", "[").replace(">", "]")
 
 
+def _replace_std_array(tname):
+    # Cython cannot declare std::array because it has a non-type template
+    # parameter, so each specialization will be declared as its own class
+    return re.sub(
+        r"\barray\[([^\[\],]+), (\d+)\]",
+        lambda match: "array_%s_%s" % (match.group(1).replace(" ", "__"),
+                                       match.group(2)), tname)
+
+
 def _is_pointer(tname):
     parts = tname.split()
     return len(parts) == 2 and parts[1] == "*"
@@ -239,6 +291,59 @@ class AutomaticTypeConverter(AbstractTypeConverter):
         return "cdef " + typedef_prefix(spec, self.type_info.typedefs)
 
 
+class StringTypeConverter(AutomaticTypeConverter):
+    """std::string that is converted according to the string policy.
+
+    With the policy 'bytes', Cython's automatic conversion from and to bytes
+    is used. With 'utf-8', str arguments are copied from their cached UTF-8
+    representation and results are decoded to str. With 'buffer', arguments
+    are copied from any C-contiguous buffer without an intermediate bytes
+    object and results are moved to an object that exports them as read-only
+    buffer. See Config.string_policy and Config.set_string_policy.
+    """
+    def matches(self):
+        return self.type_info.underlying_type(self.tname) == "string"
+
+    def add_includes(self, includes):
+        policy = _string_policy(self)
+        if self.python_argname is None:
+            if policy == "buffer":
+                includes.add_include_for_string_owner()
+        elif policy == "utf-8":
+            includes.add_cimport("cpython.unicode", "PyUnicode_AsUTF8AndSize")
+
+    def python_to_cpp(self):
+        policy = _string_policy(self)
+        if policy == "bytes":
+            return super(StringTypeConverter, self).python_to_cpp()
+        return lines(
+            render("string_data", name=self.python_argname, policy=policy,
+                   const=True),
+            "%(cpp_type_decl)s cpp_%(python_argname)s",
+            "cpp_%(python_argname)s.assign(%(python_argname)s_data, "
+            "%(python_argname)s_size)"
+        ) % {"cpp_type_decl": self.cpp_type_decl(),
+             "python_argname": self.python_argname}
+
+    def return_output(self, copy=True):
+        policy = _string_policy(self)
+        if policy == "utf-8":
+            return "return result.decode(\"utf-8\")"
+        elif policy == "buffer":
+            return lines(
+                "cdef _StringOwner result_owner = "
+                "_StringOwner.__new__(_StringOwner)",
+                "result_owner.data.swap(result)",
+                "return memoryview(result_owner)")
+        else:
+            return super(StringTypeConverter, self).return_output(copy)
+
+    def python_type_decl(self):
+        if _string_policy(self) == "bytes":
+            return super(StringTypeConverter, self).python_type_decl()
+        return "object " + self.python_argname
+
+
 class AutomaticPointerTypeConverter(AbstractTypeConverter):
     def matches(self):
         return (_is_pointer(self.tname) and
@@ -271,94 +376,391 @@ class AutomaticPointerTypeConverter(AbstractTypeConverter):
 
 
 class FixedSizeArrayTypeConverter(AbstractTypeConverter):
+    """C array with a fixed size, e.g., 'double [16]'.
+
+    Numeric arrays will be copied with memcpy from any C-contiguous buffer
+    with a matching element type, e.g., a NumPy array with a shape of (4, 4)
+    for 'double [16]'. Other sequences and buffers with another element type
+    will be copied element by element.
+    Arrays will be returned as tuple or as NumPy array if
+    Config.fixed_size_arrays_as_ndarrays is set.
+    """
     def matches(self):
         if type(self.tname) is not str:
             return False
-        match = re.match(".* \[(\d+)\]", self.tname)
+        match = re.match(r"^(.+?)\s*\[(\d+)\]$", self.tname)
         if match is None:
             return False
-        self.size = int(match.group(1))
-        self.element_type = self.tname.split(" ")[0]
+        self.size = int(match.group(2))
+        self.element_type = match.group(1)
         return is_basic_type_with_automatic_conversion(self.element_type)
 
     def n_cpp_args(self):
         return 1
 
+    def _is_numeric(self):
+        return (self.type_info.underlying_type(self.element_type)
+                in BUFFER_FORMATS)
+
+    def _returns_ndarray(self):
+        return (self._is_numeric() and
+                self.type_info.config.fixed_size_arrays_as_ndarrays)
+
     def add_includes(self, includes):
-        pass
+        includes.add_include_for(self.element_type)
+        if self.python_argname is not None and self._is_numeric():
+            includes.add_cimport("libc.string", "memcpy")
+            includes.add_include_for_flat_view()
+        if self.python_argname is None and self._returns_ndarray():
+            includes.add_cimport("libc.string", "memcpy")
+            includes.add_include_for_numpy()
+
+    def _cpp_declaration(self):
+        return "cdef %(element_type)s cpp_%(python_argname)s[%(size)s]"
+
+    def _cpp_data(self, name):
+        return name
 
     def python_to_cpp(self):
-        return lines(
-            "if len(%(python_argname)s) != %(size)s:",
-            "    raise ValueError(\"Expected list of length %(size)s, got \" + str(len(%(python_argname)s)))",
-            "cdef %(element_type)s cpp_%(python_argname)s[%(size)s]",
-            "cdef unsigned int %(python_argname)s_idx",
+        conversion = [self._cpp_declaration()]
+        if self._is_numeric():
+            conversion += [
+                "cdef const %(element_type)s[::1] %(python_argname)s_buffer = None",
+                "%(python_argname)s_items = _flat_view(%(python_argname)s)",
+                "if %(python_argname)s_items is None:",
+                "    %(python_argname)s_items = %(python_argname)s",
+                "else:",
+                "    try:",
+                "        %(python_argname)s_buffer = %(python_argname)s_items",
+                "    except ValueError:  # other element type, no fast path",
+                "        pass",
+                "if %(python_argname)s_buffer is not None:",
+                "    if %(python_argname)s_buffer.shape[0] != %(size)s:",
+                "        raise ValueError(\"Expected buffer of length %(size)s, got \" + str(%(python_argname)s_buffer.shape[0]))",
+                "    memcpy(%(cpp_data)s, &%(python_argname)s_buffer[0], %(size)s * sizeof(%(element_type)s))",
+                "else:"]
+            indent = "    "
+            items = "%(python_argname)s_items"
+        else:
+            indent = ""
+            items = "%(python_argname)s"
+        conversion += [indent + line for line in [
+            "if len(%s) != %%(size)s:" % items,
+            "    raise ValueError(\"Expected list of length %%(size)s, got \" + str(len(%s)))" % items,
             "for %(python_argname)s_idx in range(%(size)s):",
-            "    cpp_%(python_argname)s[%(python_argname)s_idx] = %(python_argname)s[%(python_argname)s_idx]"
-        ) % {"python_argname": self.python_argname,
-             "size": self.size,
-             "element_type": self.element_type}
+            "    %%(cpp_data)s[%%(python_argname)s_idx] = %s[%%(python_argname)s_idx]" % items]]
+        conversion.insert(1, "cdef unsigned int %(python_argname)s_idx")
+        return lines(*conversion) % {
+            "python_argname": self.python_argname,
+            "size": self.size,
+            "element_type": self.element_type,
+            "cpp_data": self._cpp_data("cpp_" + self.python_argname)}
 
     def cpp_call_args(self):
         return ["cpp_" + self.python_argname]
 
     def return_output(self, copy=True):
-        raise NotImplementedError("Cannot return fixed size array")
+        values = {"size": self.size, "element_type": self.element_type,
+                  "data": self._cpp_data("result")}
+        if self._returns_ndarray():
+            values["format"] = BUFFER_FORMATS[
+                self.type_info.underlying_type(self.element_type)]
+            return lines(
+                "cdef np.ndarray result_array = np.empty(%(size)s, dtype=\"%(format)s\")",
+                "memcpy(np.PyArray_DATA(result_array), %(data)s, %(size)s * sizeof(%(element_type)s))",
+                "return result_array") % values
+        else:
+            return lines(
+                "cdef unsigned int result_idx",
+                "return tuple([%(data)s[result_idx] for result_idx in range(%(size)s)])"
+            ) % values
 
     def python_type_decl(self):
-        return "list " + self.python_argname
+        return "object " + self.python_argname
 
     def cpp_type_decl(self):
-        return ""
+        return "cdef %s *" % self.element_type
+
+
+class StdArrayTypeConverter(FixedSizeArrayTypeConverter):
+    """std::array, e.g., 'std::array<double, 3>'."""
+    def matches(self):
+        if type(self.tname) is not str:
+            return False
+        match = re.match(r"^array_(.+)_(\d+)$",
+                         self.type_info.underlying_type(self.tname))
+        if match is None:
+            return False
+        self.cython_tname = match.group(0)
+        self.element_type = match.group(1).replace("__", " ")
+        self.size = int(match.group(2))
+        return is_basic_type_with_automatic_conversion(self.element_type)
+
+    def add_includes(self, includes):
+        super(StdArrayTypeConverter, self).add_includes(includes)
+        includes.add_std_array(self.cython_tname, self.element_type, self.size)
+
+    def _cpp_declaration(self):
+        return "cdef cpp.%s cpp_%%(python_argname)s" % self.cython_tname
 
+    def _cpp_data(self, name):
+        return name + ".data()"
 
-class DoubleArrayTypeConverter(AbstractTypeConverter):
+    def cpp_type_decl(self):
+        return "cdef cpp.%s" % self.cython_tname
+
+
+class ArrayTypeConverter(AbstractTypeConverter):
+    """Pointer to numeric data followed by the length of the array.
+
+    The pointer and the length will be taken from one Python object that
+    exports a C-contiguous buffer with a matching element type, e.g., a NumPy
+    array, an array.array, a bytearray, or a memoryview. The data will not be
+    copied. Read-only buffers are only accepted for pointers to const data.
+    Which parameters form such a pair can be configured with
+    Config.array_length_names and Config.array_length_types.
+    """
     def matches(self):
-        if self.context is None:
+        if (self.context is None or self.context[1] is None or
+                not _is_pointer(self.tname)):
+            return False
+        self.element_type = _type_without_pointer(self.tname)
+        if (self.type_info.underlying_type(self.element_type)
+                not in NUMERIC_TYPES):
             return False
-        args, index = self.context
-        next_arg_is_int = (len(args) >= index + 2
-                           and (args[index + 1].tipe == "int"
-                                or args[index + 1].tipe == "unsigned int"))
-        return self.tname == "double *" and next_arg_is_int
+        args, index = self.context[:2]
+        if len(args) < index + 2:
+            return False
+        config = self.type_info.config
+        return (self.type_info.underlying_type(args[index + 1].tipe)
+                in config.array_length_types and
+                config.is_array_length_name(args[index + 1].name))
 
     def n_cpp_args(self):
         return 2
 
+    def python_to_cpp(self):
+        return lines(
+            "if %(python_argname)s is None:",
+            "    raise TypeError(\"Argument '%(python_argname)s' must not be None\")",
+            "cdef %(element_type)s * cpp_%(python_argname)s = NULL",
+            "if %(python_argname)s.shape[0] > 0:",
+            "    cpp_%(python_argname)s = %(cast)s&%(python_argname)s[0]"
+        ) % {"python_argname": self.python_argname,
+             "element_type": self._element_type_decl(),
+             "cast": self._const_cast()}
+
+    def cpp_call_args(self):
+        return ["cpp_" + self.python_argname,
+                self.python_argname + ".shape[0]"]
+
+    def return_output(self, copy=True):
+        raise NotImplementedError("Cannot return array")
+
+    def python_type_decl(self):
+        return "%s%s[::1] %s" % (self._const_prefix(),
+                                 self._element_type_decl(),
+                                 self.python_argname)
+
+    def _element_type_decl(self):
+        spec = self.type_info.get_specialization(self.element_type)
+        return typedef_prefix(spec, self.type_info.typedefs)
+
+    def _const_prefix(self):
+        if _points_to_const(self):
+            return "const "
+        else:
+            return ""
+
+    def _const_cast(self):
+        """The C++ declaration of the pointer does not contain const."""
+        if _points_to_const(self):
+            return "<%s *> " % self._element_type_decl()
+        else:
+            return ""
+
+    def cpp_type_decl(self):
+        raise NotImplementedError("Array must provide additional size")
+
+
+class CharArrayTypeConverter(ArrayTypeConverter):
+    """Pointer to characters followed by their number.
+
+    Both will be taken from any C-contiguous buffer, e.g., bytes, bytearray,
+    memoryview or mmap, without copying. With the string policy 'utf-8', str
+    objects are passed as their cached UTF-8 representation. Read-only
+    buffers and str objects are only accepted for 'const char *', other
+    pointers require a writable buffer.
+    """
+    def matches(self):
+        return (super(CharArrayTypeConverter, self).matches() and
+                self.type_info.underlying_type(self.element_type) == "char")
+
+    def _policy(self):
+        if _string_policy(self) == "utf-8" and _points_to_const(self):
+            return "utf-8"
+        else:
+            return "buffer"
+
     def add_includes(self, includes):
-        includes.add_include_for_numpy()
+        if self._policy() == "utf-8":
+            includes.add_cimport("cpython.unicode", "PyUnicode_AsUTF8AndSize")
 
     def python_to_cpp(self):
-        return ""
+        return render("string_data", name=self.python_argname,
+                      policy=self._policy(), const=_points_to_const(self))
 
     def cpp_call_args(self):
-        return ["&%s[0]" % self.python_argname,
-                self.python_argname + ".shape[0]"]
+        return ["<char *> %s_data" % self.python_argname,
+                self.python_argname + "_size"]
+
+    def python_type_decl(self):
+        return "object " + self.python_argname
+
+
+class MatrixTypeConverter(ArrayTypeConverter):
+    """Pointer to a matrix followed by its number of rows and columns.
+
+    The matrix layout must be registered for the function with
+    Config.register_matrix_argument. The data can be stored in row-major
+    ('C') or column-major ('F') order and it can be followed by the leading
+    dimension, i.e., the distance between the first elements of two
+    consecutive rows ('C') or columns ('F'). The matrix will be taken from one
+    two-dimensional buffer. If its memory layout does not match, it will be
+    copied for pointers to const data. Otherwise the C++ function could
+    modify the copy and a ValueError will be raised.
+    """
+    def matches(self):
+        if (self.context is None or len(self.context) < 3 or
+                self.context[1] is None or not _is_pointer(self.tname)):
+            return False
+        self.element_type = _type_without_pointer(self.tname)
+        if (self.type_info.underlying_type(self.element_type)
+                not in NUMERIC_TYPES):
+            return False
+        args, index, function_key = self.context
+        config = self.type_info.config
+        layout = config.matrix_argument(function_key, args[index].name)
+        if layout is None:
+            return False
+        self.order, self.leading_dimension = layout
+        n_sizes = self.n_cpp_args() - 1
+        if len(args) < index + 1 + n_sizes:
+            return False
+        return all(self.type_info.underlying_type(arg.tipe)
+                   in config.array_length_types
+                   for arg in args[index + 1:index + 1 + n_sizes])
+
+    def n_cpp_args(self):
+        if self.leading_dimension:
+            return 4
+        else:
+            return 3
+
+    def add_includes(self, includes):
+        includes.add_include_for_matrix()
+
+    def python_to_cpp(self):
+        fortran = self.order == "F"
+        if fortran:
+            copy, outer = "copy_fortran", 1
+        else:
+            copy, outer = "copy", 0
+        conversion = [
+            "if %(python_argname)s is None:",
+            "    raise TypeError(\"Argument '%(python_argname)s' must not be None\")",
+            "if not _matrix_layout_matches(%(python_argname)s.shape[0], %(python_argname)s.shape[1], %(python_argname)s.strides[0], %(python_argname)s.strides[1], sizeof(%(element_type)s), %(fortran)s, %(leading_dimension)s):"]
+        if _points_to_const(self):
+            conversion += [
+                "    %(python_argname)s = %(python_argname)s.%(copy)s()",
+                "    _matrix_copied(\"%(python_argname)s\", %(warn)s)"]
+        else:
+            conversion += [
+                "    raise ValueError(\"The memory layout of matrix '%(python_argname)s' does not match and it cannot be copied because it might be modified\")"]
+        conversion += [
+            "cdef %(element_type)s * cpp_%(python_argname)s = NULL",
+            "if %(python_argname)s.shape[0] > 0 and %(python_argname)s.shape[1] > 0:",
+            "    cpp_%(python_argname)s = %(cast)s&%(python_argname)s[0, 0]"]
+        if self.leading_dimension:
+            conversion.extend([
+                "cdef Py_ssize_t cpp_%(python_argname)s_ld = %(python_argname)s.shape[%(inner)d]",
+                "if %(python_argname)s.shape[%(outer)d] > 1:",
+                "    cpp_%(python_argname)s_ld = %(python_argname)s.strides[%(outer)d] // sizeof(%(element_type)s)"])
+        return lines(*conversion) % {
+            "python_argname": self.python_argname,
+            "element_type": self._element_type_decl(),
+            "fortran": fortran,
+            "leading_dimension": self.leading_dimension,
+            "copy": copy,
+            "outer": outer,
+            "inner": 1 - outer,
+            "warn": self.type_info.config.warn_on_matrix_copy,
+            "cast": self._const_cast()}
+
+    def cpp_call_args(self):
+        call_args = ["cpp_" + self.python_argname,
+                     self.python_argname + ".shape[0]",
+                     self.python_argname + ".shape[1]"]
+        if self.leading_dimension:
+            call_args.append("cpp_%s_ld" % self.python_argname)
+        return call_args
 
     def return_output(self, copy=True):
-        raise NotImplementedError("Cannot return double array")
+        raise NotImplementedError("Cannot return matrix")
 
     def python_type_decl(self):
-        return "np.ndarray[double, ndim=1] %s" % self.python_argname
+        return "%s%s[:, :] %s" % (self._const_prefix(),
+                                  self._element_type_decl(),
+                                  self.python_argname)
 
     def cpp_type_decl(self):
-        raise NotImplementedError("Double array must provide additional size")
+        raise NotImplementedError("Matrix must provide additional sizes")
 
 
 class CStringTypeConverter(AbstractTypeConverter):
+    """Null-terminated string.
+
+    Arguments are bytes objects or, with the string policy 'utf-8', str
+    objects whose cached UTF-8 representation is passed without copying.
+    Results are returned as bytes or decoded to str with the policy 'utf-8'.
+    """
     def matches(self):
         return self.tname == "char *"
 
     def n_cpp_args(self):
         return 1
 
+    def add_includes(self, includes):
+        if self.python_argname is not None and self._decodes():
+            includes.add_cimport("cpython.unicode", "PyUnicode_AsUTF8")
+
+    def _decodes(self):
+        return _string_policy(self) == "utf-8"
+
     def python_to_cpp(self):
-        return ""
+        if not self._decodes():
+            return ""
+        return lines(
+            "cdef const char * cpp_%(python_argname)s",
+            "if isinstance(%(python_argname)s, str):",
+            "    cpp_%(python_argname)s = PyUnicode_AsUTF8(%(python_argname)s)",
+            "else:",
+            "    cpp_%(python_argname)s = %(python_argname)s"
+        ) % {"python_argname": self.python_argname}
 
     def cpp_call_args(self):
+        if self._decodes():
+            return ["<char *> cpp_" + self.python_argname]
         return [self.python_argname]
 
+    def return_output(self, copy=True):
+        if self._decodes():
+            return "return result.decode(\"utf-8\")"
+        return super(CStringTypeConverter, self).return_output(copy)
+
     def python_type_decl(self):
+        if self._decodes():
+            return "object " + self.python_argname
         return self.tname + " " + self.python_argname
 
     def cpp_type_decl(self):
@@ -366,6 +768,12 @@ class CStringTypeConverter(AbstractTypeConverter):
 
 
 class EnumConverter(AbstractTypeConverter):
+    """Converts enums.
+
+    Arguments are converted to the C enum directly from ints, which
+    includes the IntEnum members. Results are mapped to the cached member
+    of the IntEnum.
+    """
     def matches(self):
         return (self.type_info.underlying_type(self.tname) in
                 self.type_info.enums)
@@ -383,14 +791,16 @@ class EnumConverter(AbstractTypeConverter):
         return [self.python_argname]
 
     def return_output(self, copy=True):
-        raise NotImplementedError("Cannot return enum")
+        return "return _%s_from_cpp(result)" % (
+            self.type_info.underlying_type(self.tname))
 
     def python_type_decl(self):
         spec = self.type_info.get_specialization(self.tname)
         return "cpp.%s %s" % (spec, self.python_argname)
 
     def cpp_type_decl(self):
-        raise NotImplementedError("Cannot declare new enum instance")
+        spec = self.type_info.get_specialization(self.tname)
+        return "cdef cpp.%s" % spec
 
 
 class CythonTypeConverter(AbstractTypeConverter):
@@ -403,6 +813,12 @@ class CythonTypeConverter(AbstractTypeConverter):
 
     def add_includes(self, includes):
         includes.add_include_for_deref()
+        if self.python_argname is None and not self._is_value_type():
+            includes.add_include_for_result()
+
+    def _is_value_type(self):
+        return self.type_info.config.is_value_type(
+            self.type_info.underlying_type(self.tname))
 
     def python_to_cpp(self):
         cython_argname = "cpp_" + self.python_argname
@@ -413,10 +829,17 @@ class CythonTypeConverter(AbstractTypeConverter):
         return ["deref(cpp_%s)" % self.python_argname]
 
     def return_output(self, copy=True):
-        # TODO only works with default and assignment operator
-        return lines("ret = %s()" % self.tname,
-                     "ret.thisptr[0] = result",
-                     "return ret")
+        # __init__ is not called, the result has been moved to the heap or
+        # value types are assigned to the object in the Python object
+        if self._is_value_type():
+            assignment = "ret.thisptr[0] = result"
+        else:
+            assignment = "ret.thisptr = result.release()"
+        return lines(
+            "cdef %(tname)s ret = %(tname)s.__new__(%(tname)s)",
+            assignment,
+            "return ret"
+        ) % {"tname": self.tname}
 
     def python_type_decl(self):
         spec = self.type_info.get_specialization(self.tname)
@@ -424,6 +847,8 @@ class CythonTypeConverter(AbstractTypeConverter):
                           self.python_argname)
 
     def cpp_type_decl(self):
+        if self.python_argname is None and not self._is_value_type():
+            return "cdef cpp._Result[cpp.%s]" % self.tname
         return "cdef cpp.%s" % self.tname
 
 
@@ -454,8 +879,8 @@ class CppPointerTypeConverter(AbstractTypeConverter):
         return ["cpp_%s" % self.python_argname]
 
     def return_output(self, copy=True):
-        # TODO only works with default constructor
-        l = ["ret = %s()" % self.tname_wo_ptr,
+        l = ["cdef %(tname)s ret = %(tname)s.__new__(%(tname)s)"
+             % {"tname": self.tname_wo_ptr},
              "ret.thisptr = result"]
         if not copy:
             l.append("ret.delete_thisptr = False")
@@ -471,6 +896,131 @@ class CppPointerTypeConverter(AbstractTypeConverter):
         return "cdef cpp.%s" % self.tname
 
 
+class ReferenceViewTypeConverter(AbstractTypeConverter):
+    """Returns a wrapped object that points into its parent without copying.
+
+    This converter is not selected automatically. It is used for methods
+    that return references and for fields if they are configured with
+    Config.return_reference_as_view. The view keeps a reference to the
+    parent object so that the C++ object stays alive.
+    """
+    def matches(self):
+        return (self.type_info.underlying_type(self.tname) in
+                self.type_info.classes)
+
+    def n_cpp_args(self):
+        return 1
+
+    def python_to_cpp(self):
+        raise NotImplementedError("Views are only returned")
+
+    def cpp_call_args(self):
+        raise NotImplementedError("Views are only returned")
+
+    def return_output(self, copy=True):
+        return lines(
+            "cdef %(tname)s ret = %(tname)s.__new__(%(tname)s)",
+            "ret.thisptr = result",
+            "ret.delete_thisptr = False",
+            "ret.owner = self",
+            "return ret"
+        ) % {"tname": self.tname}
+
+    def python_type_decl(self):
+        raise NotImplementedError("Views are only returned")
+
+    def cpp_type_decl(self):
+        return "cdef cpp.%s *" % self.tname
+
+
+class SharedPtrTypeConverter(AbstractTypeConverter):
+    """Converts std::shared_ptr of wrapped classes.
+
+    Returned shared pointers will be adopted by a new wrapper object. Passing
+    a wrapper object to a function shares the ownership of its C++ object with
+    the function. None corresponds to an empty shared pointer.
+    """
+    def matches(self):
+        match = re.match(r"^shared_ptr\[(.+)\]$",
+                         self.type_info.underlying_type(self.tname))
+        if match is None:
+            return False
+        self.class_name = match.group(1).strip()
+        return self.class_name in self.type_info.classes
+
+    def n_cpp_args(self):
+        return 1
+
+    def python_to_cpp(self):
+        return lines(
+            "%(cpp_type_decl)s cpp_%(python_argname)s",
+            "if %(python_argname)s is not None:",
+            "    cpp_%(python_argname)s = %(python_argname)s._shared()"
+        ) % {"cpp_type_decl": self.cpp_type_decl(),
+             "python_argname": self.python_argname}
+
+    def cpp_call_args(self):
+        return ["cpp_%s" % self.python_argname]
+
+    def return_output(self, copy=True):
+        return lines(
+            "if result.get() == NULL:",
+            "    return None",
+            "cdef %(class_name)s ret = %(class_name)s.__new__(%(class_name)s)",
+            "ret.thisshared.swap(result)",
+            "ret.thisptr = ret.thisshared.get()",
+            "ret.delete_thisptr = False",
+            "return ret"
+        ) % {"class_name": self.class_name}
+
+    def python_type_decl(self):
+        return "%s %s" % (self.class_name, self.python_argname)
+
+    def cpp_type_decl(self):
+        return "cdef shared_ptr[cpp.%s]" % self.class_name
+
+
+class UniquePtrTypeConverter(AbstractTypeConverter):
+    """Returns std::unique_ptr of wrapped classes.
+
+    The wrapper object takes over the ownership of the C++ object. Functions
+    that take a std::unique_ptr are not supported.
+    """
+    def matches(self):
+        if self.python_argname is not None:
+            return False
+        match = re.match(r"^unique_ptr\[(.+)\]$",
+                         self.type_info.underlying_type(self.tname))
+        if match is None:
+            return False
+        self.class_name = match.group(1).strip()
+        return self.class_name in self.type_info.classes
+
+    def n_cpp_args(self):
+        return 1
+
+    def python_to_cpp(self):
+        raise NotImplementedError("Cannot pass ownership to a unique_ptr")
+
+    def cpp_call_args(self):
+        raise NotImplementedError("Cannot pass ownership to a unique_ptr")
+
+    def return_output(self, copy=True):
+        return lines(
+            "if result.get() == NULL:",
+            "    return None",
+            "cdef %(class_name)s ret = %(class_name)s.__new__(%(class_name)s)",
+            "ret.thisptr = result.release()",
+            "return ret"
+        ) % {"class_name": self.class_name}
+
+    def python_type_decl(self):
+        raise NotImplementedError("Cannot pass ownership to a unique_ptr")
+
+    def cpp_type_decl(self):
+        return "cdef unique_ptr[cpp.%s]" % self.class_name
+
+
 class StlTypeConverter(AbstractTypeConverter):
     def matches(self):
         tname = self.type_info.underlying_type(self.tname)
@@ -481,6 +1031,68 @@ class StlTypeConverter(AbstractTypeConverter):
 
     def add_includes(self, includes):
         includes.add_include_for_deref()
+        if (self.python_argname is not None and
+                self._numeric_vector_element() is not None):
+            includes.add_cimport("cpython.buffer", "PyObject_CheckBuffer")
+        class_name = self._class_vector_element()
+        if class_name is not None:
+            if self.python_argname is None:
+                includes.add_vector_view(self._view(class_name), class_name)
+            else:
+                includes.add_cimport("cpython.object", "PyObject_LengthHint")
+                if class_name in self.type_info.struct_layouts:
+                    includes.add_struct_dtype(
+                        class_name, self.type_info.struct_layouts[class_name])
+                    includes.add_cimport("libc.string", "memcpy")
+        if (self.python_argname is not None and
+                self._primitive_map_types() is not None):
+            includes.add_cimport("cpython.dict", "PyDict_Next")
+            includes.add_cimport("cpython.ref", "PyObject")
+            includes.add_cimport("libcpp.utility", "pair")
+
+    def _class_vector_element(self):
+        match = re.match(r"^vector\[(.*)\]$",
+                         self.type_info.underlying_type(self.tname))
+        if match is None:
+            return None
+        element_type = self.type_info.underlying_type(match.group(1).strip())
+        if element_type not in self.type_info.classes:
+            return None
+        return element_type
+
+    def _view(self, class_name):
+        return "_VectorView_" + class_name
+
+    def _numeric_vector_element(self):
+        match = re.match(r"^vector\[(.*)\]$",
+                         self.type_info.underlying_type(self.tname))
+        if match is None:
+            return None
+        element_type = self.type_info.underlying_type(match.group(1).strip())
+        if element_type not in BUFFER_FORMATS:
+            return None
+        return element_type
+
+    def _primitive_map_types(self):
+        match = re.match(r"^map\[([^,\[\]]+),([^,\[\]]+)\]$",
+                         self.type_info.underlying_type(self.tname))
+        if match is None:
+            return None
+        key_type, value_type = [
+            self.type_info.underlying_type(t.strip()) for t in match.groups()]
+        if not (_is_primitive(key_type) and _is_primitive(value_type)):
+            return None
+        return key_type, value_type
+
+    def _primitive_set_type(self):
+        match = re.match(r"^set\[([^,\[\]]+)\]$",
+                         self.type_info.underlying_type(self.tname))
+        if match is None:
+            return None
+        key_type = self.type_info.underlying_type(match.group(1).strip())
+        if not _is_primitive(key_type):
+            return None
+        return key_type
 
     def cpp_call_args(self):
         return ["cpp_" + self.python_argname]
@@ -490,17 +1102,30 @@ class StlTypeConverter(AbstractTypeConverter):
 
     def python_to_cpp(self):
         # TODO does not work for complex template type hierarchies
-        tname = self.type_info.underlying_type(self.tname)
-        subtypes = find_all_subtypes(tname)
-        subtypes = [self.type_info.underlying_type(s)
-                    for s in subtypes]
         cython_argname = "cpp_" + self.python_argname
 
-        if (tname.startswith("vector") and
-                    subtypes[1] in self.type_info.classes):
+        if self._class_vector_element() is not None:
+            # plain structs can be copied from structured arrays at once
+            class_name = self._class_vector_element()
             conversion = render(
                 "convert_vector", python_argname=self.python_argname,
-                cpp_tname=self.type_info.underlying_type(subtypes[1]),
+                cpp_tname=class_name,
+                struct=class_name in self.type_info.struct_layouts,
+                cpp_type_decl=self.cpp_type_decl(),
+                cython_argname=cython_argname)
+        elif self._primitive_map_types() is not None:
+            # iterate over dicts without creating item tuples
+            key_type, value_type = self._primitive_map_types()
+            conversion = render(
+                "convert_map", python_argname=self.python_argname,
+                key_type=key_type, value_type=value_type,
+                cpp_type_decl=self.cpp_type_decl(),
+                cython_argname=cython_argname)
+        elif self._numeric_vector_element() is not None:
+            # copy contiguous buffers with matching type directly
+            conversion = render(
+                "convert_numeric_vector", python_argname=self.python_argname,
+                element_type=self._numeric_vector_element(),
                 cpp_type_decl=self.cpp_type_decl(),
                 cython_argname=cython_argname)
         else:
@@ -508,6 +1133,17 @@ class StlTypeConverter(AbstractTypeConverter):
                                          self.python_argname)
         return conversion
 
+    def return_output(self, copy=True):
+        class_name = self._class_vector_element()
+        if class_name is None:
+            return super(StlTypeConverter, self).return_output(copy)
+        # the elements will be wrapped lazily
+        return lines(
+            "cdef %(view)s result_view = %(view)s.__new__(%(view)s)",
+            "result_view.data.swap(result)",
+            "return result_view"
+        ) % {"view": self._view(class_name)}
+
     def cpp_type_decl(self):
         tname = self.tname
         subtypes = find_all_subtypes(tname)
@@ -522,8 +1158,136 @@ class StlTypeConverter(AbstractTypeConverter):
         return "cdef " + typedef_prefix(tname, self.type_info.typedefs)
 
 
+class VectorArrayTypeConverter(StlTypeConverter):
+    """Returns a std::vector of numbers as NumPy array without copying.
+
+    The vector will be moved to an owner object that exports its data with
+    the buffer protocol. Vectors of plain structs of numbers are returned
+    as structured arrays. It must be enabled for the function with
+    Config.return_vector_as_array or for all functions with
+    Config.vectors_as_arrays.
+    """
+    def matches(self):
+        if self.context is None or self.context[1] is not None:
+            return False
+        tname = self.type_info.underlying_type(self.tname)
+        match = re.match(r"^vector\[(.*)\]$", tname)
+        if match is None:
+            return False
+        self.element_type = self.type_info.underlying_type(
+            match.group(1).strip())
+        return ((self.element_type in BUFFER_FORMATS or
+                 self.element_type in self.type_info.struct_layouts) and
+                self.type_info.config.is_vector_returned_as_array(
+                    self.context[2]))
+
+    def add_includes(self, includes):
+        includes.add_include_for_numpy()
+        layout = self.type_info.struct_layouts.get(self.element_type)
+        if layout is None:
+            super(VectorArrayTypeConverter, self).add_includes(includes)
+            includes.add_vector_owner(self._owner(), self.element_type,
+                                      BUFFER_FORMATS[self.element_type])
+        else:
+            includes.add_struct_dtype(self.element_type, layout)
+            includes.add_vector_owner(self._owner(),
+                                      "cpp." + self.element_type,
+                                      _struct_format(layout))
+
+    def return_output(self, copy=True):
+        if self.element_type in self.type_info.struct_layouts:
+            array = "np.frombuffer(result_owner, dtype=%s_dtype)" % (
+                self.element_type)
+        else:
+            array = "np.asarray(result_owner)"
+        return lines(
+            "cdef %(owner)s result_owner = %(owner)s.__new__(%(owner)s)",
+            "result_owner.data.swap(result)",
+            "return %(array)s"
+        ) % {"owner": self._owner(), "array": array}
+
+    def _owner(self):
+        return "_VectorOwner_" + self.element_type.replace(" ", "_")
+
+
+class ContainerViewTypeConverter(StlTypeConverter):
+    """Returns a std::map or std::set as read-only view without copying.
+
+    The container will be moved to a view that implements Mapping or Set and
+    converts keys and values on access. It must be enabled for the function
+    with Config.return_container_as_view or for all functions with
+    Config.containers_as_views.
+    """
+    def matches(self):
+        if self.context is None or self.context[1] is not None:
+            return False
+        if (self._primitive_map_types() is None and
+                self._primitive_set_type() is None):
+            return False
+        return self.type_info.config.is_container_returned_as_view(
+            self.context[2])
+
+    def add_includes(self, includes):
+        super(ContainerViewTypeConverter, self).add_includes(includes)
+        map_types = self._primitive_map_types()
+        if map_types is None:
+            includes.add_container_view(self._view(),
+                                        self._primitive_set_type())
+        else:
+            includes.add_container_view(self._view(), *map_types)
+
+    def return_output(self, copy=True):
+        return lines(
+            "cdef %(view)s result_view = %(view)s.__new__(%(view)s)",
+            "result_view.data.swap(result)",
+            "return result_view"
+        ) % {"view": self._view()}
+
+    def _view(self):
+        map_types = self._primitive_map_types()
+        if map_types is None:
+            name = "_SetView_" + self._primitive_set_type()
+        else:
+            name = "_MapView_%s_%s" % map_types
+        return name.replace(" ", "_")
+
+
+def _points_to_const(converter):
+    """Does the C++ argument of the converter point to const data?"""
+    if converter.context is None or converter.context[1] is None:
+        return False
+    args, index = converter.context[:2]
+    return args[index].const
+
+
+def _string_policy(converter):
+    config = converter.type_info.config
+    if converter.context is None:
+        return config.string_policy
+    return config.string_policy_of(converter.context[2])
+
+
+def _struct_format(layout):
+    """Buffer format of a struct with explicit padding."""
+    format = "T{"
+    end = 0
+    for field in sorted(layout["fields"], key=lambda field: field["offset"]):
+        format += "x" * (field["offset"] - end)
+        format += "%s:%s:" % (field["format"], field["name"])
+        end = field["offset"] + struct.calcsize(field["format"])
+    format += "x" * (layout["itemsize"] - end)
+    return format + "}"
+
+
+def _is_primitive(tname):
+    return tname in NUMERIC_TYPES or tname in ["bool", "string"]
+
+
 default_converters = [
-    FixedSizeArrayTypeConverter, DoubleArrayTypeConverter, CStringTypeConverter,
-    VoidTypeConverter, AutomaticTypeConverter, AutomaticPointerTypeConverter,
+    FixedSizeArrayTypeConverter, StdArrayTypeConverter, MatrixTypeConverter,
+    CharArrayTypeConverter, ArrayTypeConverter, CStringTypeConverter,
+    VoidTypeConverter, StringTypeConverter, AutomaticTypeConverter,
+    AutomaticPointerTypeConverter,
     EnumConverter, CythonTypeConverter, CppPointerTypeConverter,
-    StlTypeConverter]
+    SharedPtrTypeConverter, UniquePtrTypeConverter,
+    VectorArrayTypeConverter, ContainerViewTypeConverter, StlTypeConverter]
@@ -0,0 +1,30 @@
+#include <cstddef>
+#include <stdint.h>
+
+
+float sumFloats(const float* values, size_t n)
+{
+    float sum = 0.0f;
+    for(size_t i = 0; i < n; i++)
+        sum += values[i];
+    return sum;
+}
+
+long sumInts(int32_t* values, long size)
+{
+    long sum = 0;
+    for(long i = 0; i < size; i++)
+        sum += values[i];
+    return sum;
+}
+
+void increment(uint8_t* bytes, unsigned len)
+{
+    for(unsigned i = 0; i < len; i++)
+        bytes[i]++;
+}
+
+double first(double* values, int offset)
+{
+    return values[offset];
+}
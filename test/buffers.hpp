@@ -0,0 +1,43 @@
+#include <vector>
+
+
+class Image
+{
+    int rows_, cols_;
+    std::vector<float> pixels;
+public:
+    Image(int rows, int cols)
+        : rows_(rows), cols_(cols), pixels(rows * cols, 0.0f)
+    {
+    }
+
+    int rows() { return rows_; }
+    int cols() { return cols_; }
+    float* data() { return &pixels[0]; }
+
+    void reshape(int rows, int cols)
+    {
+        rows_ = rows;
+        cols_ = cols;
+    }
+
+    float get(int row, int col)
+    {
+        return pixels[row * cols_ + col];
+    }
+};
+
+class Signal
+{
+    std::vector<double> samples;
+public:
+    Signal(int n)
+        : samples(n)
+    {
+        for(int i = 0; i < n; i++)
+            samples[i] = i;
+    }
+
+    int size() { return samples.size(); }
+    const double* data() { return &samples[0]; }
+};
@@ -0,0 +1,26 @@
+class Counter
+{
+    int count;
+public:
+    Counter() : count(0) {}
+
+    void add(int value)
+    {
+        count += value;
+    }
+
+    void merge(const Counter& other)
+    {
+        count += other.count;
+    }
+
+    int get() const
+    {
+        return count;
+    }
+};
+
+int twice(int value)
+{
+    return 2 * value;
+}
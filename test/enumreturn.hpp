@@ -0,0 +1,25 @@
+enum Color
+{
+    RED = 1,
+    GREEN = 2,
+    BLUE = 4
+};
+
+
+Color nextColor(Color color)
+{
+    switch(color)
+    {
+    case RED:
+        return GREEN;
+    case GREEN:
+        return BLUE;
+    default:
+        return RED;
+    }
+}
+
+Color mixColors(Color first, Color second)
+{
+    return static_cast<Color>(first | second);
+}
@@ -0,0 +1,102 @@
+#include <vector>
+
+class Point
+{
+    double x;
+public:
+    Point() : x(0.0) {}
+
+    void setX(double value)
+    {
+        x = value;
+    }
+
+    double getX() const
+    {
+        return x;
+    }
+};
+
+class Samples
+{
+    double data[3];
+public:
+    Samples()
+    {
+        data[0] = 1.0;
+        data[1] = 2.0;
+        data[2] = 3.0;
+    }
+
+    const double* begin() const
+    {
+        return data;
+    }
+
+    const double* end() const
+    {
+        return data + 3;
+    }
+};
+
+class Polygon
+{
+    std::vector<Point> points;
+public:
+    typedef std::vector<Point>::iterator iterator;
+
+    void add(const Point& point)
+    {
+        points.push_back(point);
+    }
+
+    iterator begin()
+    {
+        return points.begin();
+    }
+
+    iterator end()
+    {
+        return points.end();
+    }
+};
+
+class CountdownIterator
+{
+    int i;
+public:
+    CountdownIterator(int i = 0) : i(i) {}
+
+    int operator*() const
+    {
+        return i;
+    }
+
+    CountdownIterator& operator++()
+    {
+        --i;
+        return *this;
+    }
+
+    bool operator!=(const CountdownIterator& other) const
+    {
+        return i != other.i;
+    }
+};
+
+class Countdown
+{
+    int start;
+public:
+    Countdown(int start) : start(start) {}
+
+    CountdownIterator begin() const
+    {
+        return CountdownIterator(start);
+    }
+
+    CountdownIterator end() const
+    {
+        return CountdownIterator(0);
+    }
+};
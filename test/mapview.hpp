@@ -0,0 +1,28 @@
+#include <map>
+#include <set>
+#include <string>
+
+
+std::map<int, double> squares(int n)
+{
+    std::map<int, double> result;
+    for(int i = 0; i < n; i++)
+        result[i] = i * i;
+    return result;
+}
+
+std::set<std::string> names()
+{
+    std::set<std::string> result;
+    result.insert("b");
+    result.insert("a");
+    return result;
+}
+
+double sumValues(const std::map<int, double>& m)
+{
+    double sum = 0.0;
+    for(std::map<int, double>::const_iterator it = m.begin(); it != m.end(); it++)
+        sum += it->second;
+    return sum;
+}
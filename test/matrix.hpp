@@ -0,0 +1,24 @@
+#include <cstddef>
+
+
+double rowMajorElement(const double* data, int rows, int cols, int i, int j)
+{
+    return data[i * cols + j];
+}
+
+double colMajorElement(const double* data, int rows, int cols, int i, int j)
+{
+    return data[j * rows + i];
+}
+
+double stridedElement(const double* data, size_t rows, size_t cols,
+                      size_t stride, size_t i, size_t j)
+{
+    return data[i * stride + j];
+}
+
+void scale(float* data, int rows, int cols, float factor)
+{
+    for(int k = 0; k < rows * cols; k++)
+        data[k] *= factor;
+}
@@ -0,0 +1,30 @@
+#include <cmath>
+#include <stdexcept>
+
+
+double sumOfSines(int n)
+{
+    if(n < 0)
+        throw std::invalid_argument("n must not be negative");
+    double sum = 0.0;
+    for(int i = 0; i < n; i++)
+        sum += std::sin((double) i);
+    return sum;
+}
+
+class Worker
+{
+    int n;
+public:
+    Worker(int n) : n(n) {}
+
+    double run()
+    {
+        return sumOfSines(n);
+    }
+
+    void setN(int n)
+    {
+        this->n = n;
+    }
+};
@@ -0,0 +1,21 @@
+int add(int a, int b)
+{
+    return a + b;
+}
+
+class Accumulator
+{
+    double total;
+public:
+    Accumulator(double start) : total(start) {}
+
+    void add(double value)
+    {
+        total += value;
+    }
+
+    double get() const
+    {
+        return total;
+    }
+};
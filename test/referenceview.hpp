@@ -0,0 +1,17 @@
+class Inner
+{
+    int value;
+public:
+    Inner() : value(0) {}
+    int getValue() const { return value; }
+    void setValue(int value) { this->value = value; }
+};
+
+class Outer
+{
+    Inner inner;
+public:
+    Inner& getInner() { return inner; }
+    const Inner& getConstInner() const { return inner; }
+    Inner copyInner() const { return inner; }
+};
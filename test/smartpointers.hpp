@@ -0,0 +1,42 @@
+#include <memory>
+
+
+class Resource
+{
+    int value;
+public:
+    Resource(int value) : value(value) {}
+    int getValue() { return value; }
+    void setValue(int value) { this->value = value; }
+};
+
+std::shared_ptr<Resource> createShared(int value)
+{
+    return std::make_shared<Resource>(value);
+}
+
+std::shared_ptr<Resource> createEmpty()
+{
+    return std::shared_ptr<Resource>();
+}
+
+std::unique_ptr<Resource> createUnique(int value)
+{
+    return std::unique_ptr<Resource>(new Resource(value));
+}
+
+long useCount(std::shared_ptr<Resource> resource)
+{
+    return resource.use_count();
+}
+
+class Holder
+{
+    std::shared_ptr<Resource> resource;
+public:
+    void hold(std::shared_ptr<Resource> resource)
+    {
+        this->resource = resource;
+    }
+    std::shared_ptr<Resource> get() { return resource; }
+};
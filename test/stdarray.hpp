@@ -0,0 +1,22 @@
+#include <array>
+
+
+std::array<double, 3> cross(const std::array<double, 3>& a,
+                            const std::array<double, 3>& b)
+{
+    std::array<double, 3> result = {{
+        a[1] * b[2] - a[2] * b[1],
+        a[2] * b[0] - a[0] * b[2],
+        a[0] * b[1] - a[1] * b[0]}};
+    return result;
+}
+
+double trace(double matrix[16])
+{
+    return matrix[0] + matrix[5] + matrix[10] + matrix[15];
+}
+
+struct Transform
+{
+    double matrix[16];
+};
@@ -0,0 +1,40 @@
+#include <string>
+#include <cstddef>
+
+
+std::string repeat(const std::string& s, int n)
+{
+    std::string result;
+    for(int i = 0; i < n; i++)
+        result += s;
+    return result;
+}
+
+std::size_t countZeros(const char* data, std::size_t size)
+{
+    std::size_t count = 0;
+    for(std::size_t i = 0; i < size; i++)
+        if(data[i] == 0)
+            count++;
+    return count;
+}
+
+int cLength(const char* s)
+{
+    int i = 0;
+    while(s[i] != 0)
+        i++;
+    return i;
+}
+
+const char* greeting()
+{
+    return "h\xc3\xa9llo";
+}
+
+void toUpper(char* data, std::size_t size)
+{
+    for(std::size_t i = 0; i < size; i++)
+        if(data[i] >= 'a' && data[i] <= 'z')
+            data[i] -= 'a' - 'A';
+}
@@ -0,0 +1,35 @@
+#include <vector>
+
+class Record
+{
+    double weight;
+    int id;
+    bool active;
+public:
+    double getWeight() const { return weight; }
+    int getId() const { return id; }
+    bool isActive() const { return active; }
+    void set(int id, double weight, bool active)
+    {
+        this->id = id;
+        this->weight = weight;
+        this->active = active;
+    }
+};
+
+std::vector<Record> makeRecords(int n)
+{
+    std::vector<Record> records(n);
+    for(int i = 0; i < n; i++)
+        records[i].set(i, 0.5 * i, i % 2 == 0);
+    return records;
+}
+
+double sumOfActiveWeights(const std::vector<Record>& records)
+{
+    double sum = 0.0;
+    for(unsigned i = 0; i < records.size(); i++)
+        if(records[i].isActive())
+            sum += records[i].getWeight();
+    return sum;
+}
@@ -1,5 +1,14 @@
-from pywrap.testing import cython_extension_from
-from nose.tools import assert_equal, assert_not_equal
+import threading
+from enum import IntEnum
+import numpy as np
+from numpy.testing import assert_array_equal
+from pywrap.testing import cython_extension_from, full_paths
+from pywrap.defaultconfig import Config
+from pywrap.cython import write_files, run_setup
+from pywrap.templates import render
+from pywrap.utils import lines, remove_files
+from nose.tools import (assert_equal, assert_not_equal, assert_raises,
+                        assert_true, assert_is_none, assert_in)
 
 
 def test_namespaces():
@@ -47,6 +56,26 @@ def test_vector_of_struct():
         b.active = True
         entries = [a, b]
         assert_equal(sum_of_activated_entries(entries), 10)
+        assert_raises(TypeError, sum_of_activated_entries, [a, None])
+
+
+def test_vector_of_struct_view():
+    with cython_extension_from("vectorofstruct.hpp"):
+        from vectorofstruct import make_entries, sum_of_activated_entries
+        entries = make_entries(5)
+        assert_equal(len(entries), 5)
+        assert_equal(entries[3].value, 3)
+        assert_equal(entries[-1].value, 4)
+        assert_equal([e.active for e in entries],
+                     [True, False, True, False, True])
+        assert_equal([e.value for e in entries[1:3]], [1, 2])
+        assert_raises(IndexError, entries.__getitem__, 5)
+        assert_equal(sum_of_activated_entries(entries), 6)
+        entries[1].active = True
+        assert_equal(sum_of_activated_entries(entries), 7)
+        last = entries[4]
+        del entries
+        assert_equal(last.value, 4)
 
 
 def test_operators():
@@ -96,8 +125,10 @@ def test_complex_field():
 
 
 def test_enum():
-    with cython_extension_from("enum.hpp"):
-        from enum import MyEnum, enum_to_string
+    config = Config()
+    config.string_policy = "utf-8"
+    with cython_extension_from("enums.hpp", config=config):
+        from enums import MyEnum, enum_to_string
         assert_not_equal(MyEnum.FIRSTOPTION, MyEnum.SECONDOPTION)
         assert_not_equal(MyEnum.SECONDOPTION, MyEnum.THIRDOPTION)
         assert_equal(enum_to_string(MyEnum.FIRSTOPTION), "first")
@@ -106,7 +137,9 @@ def test_enum():
 
 
 def test_enum_in_class():
-    with cython_extension_from("enuminclass.hpp"):
+    config = Config()
+    config.string_policy = "utf-8"
+    with cython_extension_from("enuminclass.hpp", config=config):
         from enuminclass import MyEnum, enum_to_string
         assert_not_equal(MyEnum.FIRSTOPTION, MyEnum.SECONDOPTION)
         assert_not_equal(MyEnum.SECONDOPTION, MyEnum.THIRDOPTION)
@@ -115,8 +148,246 @@ def test_enum_in_class():
         assert_equal(enum_to_string(MyEnum.THIRDOPTION), "third")
 
 
+def test_enum_return():
+    with cython_extension_from("enumreturn.hpp"):
+        from enumreturn import Color, next_color, mix_colors
+        assert_true(issubclass(Color, IntEnum))
+        assert_true(next_color(Color.RED) is Color.GREEN)
+        assert_true(next_color(2) is Color.BLUE)
+        assert_raises(ValueError, mix_colors, Color.RED, Color.GREEN)
+        assert_raises(TypeError, next_color, "red")
+
+
 def test_static_method():
     with cython_extension_from("staticmethod.hpp"):
         from staticmethod import plus1, plus2
         assert_equal(plus1(1), 2)
         assert_equal(plus2(1), 3)
+
+
+def test_release_gil():
+    config = Config()
+    config.release_gil_in_function("sumOfSines")
+    config.release_gil_in_class("Worker")
+    with cython_extension_from("nogil.hpp", config=config):
+        from nogil import sum_of_sines, Worker
+        results = []
+        threads = [threading.Thread(
+            target=lambda: results.append(Worker(1000).run()))
+            for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert_equal(results, [sum_of_sines(1000)] * 4)
+        assert_raises(ValueError, sum_of_sines, -1)
+
+
+def test_buffer_protocol():
+    config = Config()
+    config.register_buffer("Image", "data", ["rows", "cols"], "float")
+    config.register_buffer("Signal", "data", "size", "double", readonly=True)
+    with cython_extension_from("buffers.hpp", config=config):
+        from buffers import Image, Signal
+        image = Image(2, 3)
+        a = np.asarray(image)
+        assert_equal(a.shape, (2, 3))
+        assert_equal(a.dtype, np.float32)
+        a[1, 2] = 5.0
+        assert_equal(image.get(1, 2), 5.0)
+        view = memoryview(image)
+        image.reshape(3, 2)
+        assert_equal(view.shape, (2, 3))
+        assert_equal(memoryview(image).shape, (3, 2))
+        view.release()
+        del image
+        assert_equal(a.sum(), 5.0)
+        signal = Signal(4)
+        assert_array_equal(np.asarray(signal), [0.0, 1.0, 2.0, 3.0])
+        assert_equal(memoryview(signal).readonly, True)
+        assert_equal(signal.__array_interface__["typestr"][1:], "f8")
+
+
+def test_vectorize():
+    config = Config()
+    config.vectorize_function("hypotenuse")
+    config.vectorize_function("scale")
+    config.vectorize_method("Polynomial", "evaluate")
+    with cython_extension_from("vectorize.hpp", config=config):
+        from vectorize import hypotenuse_vec, polynomial_scale_vec, Polynomial
+        assert_true(isinstance(hypotenuse_vec, np.ufunc))
+        assert_array_equal(hypotenuse_vec(np.array([3.0, 6.0]), 4.0),
+                           [5.0, np.hypot(6.0, 4.0)])
+        out = np.empty((2, 2))
+        hypotenuse_vec(np.full((2, 1), 3.0), np.array([4.0, 0.0]), out=out)
+        assert_array_equal(out, [[5.0, 3.0], [5.0, 3.0]])
+        assert_raises(ValueError, hypotenuse_vec, np.array([3.0, np.nan]),
+                      4.0)
+        assert_array_equal(
+            polynomial_scale_vec(np.arange(3, dtype=np.float32), 2.0),
+            [0.0, 2.0, 4.0])
+        p = Polynomial(1.0, 0.0, 1.0)
+        assert_array_equal(p.evaluate_vec(np.arange(8.0)[::2]),
+                           [1.0, 5.0, 17.0, 37.0])
+        assert_raises(ValueError, p.evaluate_vec, np.array([1.0, np.nan]))
+
+
+def test_value_type_with_freelist():
+    config = Config()
+    config.set_freelist("Color", 8)
+    config.value_type("Color")
+    with cython_extension_from("valuetype.hpp", config=config):
+        from valuetype import Color, new_black
+        colors = [Color(10, 20, 30) for _ in range(20)]
+        del colors
+        c = Color(10, 20, 30)
+        assert_equal(c.sum(), 60)
+        assert_equal(c.inverted().sum(), 705)
+        assert_equal(new_black().inverted().sum(), 765)
+
+
+def test_smart_pointers():
+    with cython_extension_from("smartpointers.hpp"):
+        from smartpointers import (Resource, Holder, create_shared,
+                                   create_empty, create_unique, use_count)
+        r = create_shared(3)
+        assert_equal(r.get_value(), 3)
+        assert_is_none(create_empty())
+        assert_equal(create_unique(5).get_value(), 5)
+        assert_equal(use_count(None), 0)
+
+        h = Holder()
+        x = Resource(7)
+        h.hold(x)
+        del x
+        h.get().set_value(9)
+        assert_equal(h.get().get_value(), 9)
+
+
+def test_reference_returned_as_view():
+    config = Config()
+    config.return_reference_as_view("Outer", "getInner")
+    config.return_reference_as_view("Outer", "getConstInner")
+    with cython_extension_from("referenceview.hpp", config=config):
+        from referenceview import Outer
+        outer = Outer()
+        inner = outer.get_inner()
+        inner.set_value(4)
+        assert_equal(outer.get_const_inner().get_value(), 4)
+        outer.get_const_inner().set_value(42)
+        assert_equal(outer.get_inner().get_value(), 4)
+        copy = outer.copy_inner()
+        copy.set_value(1)
+        assert_equal(outer.get_inner().get_value(), 4)
+        del outer
+        assert_equal(inner.get_value(), 4)
+
+
+def test_field_returned_as_view():
+    config = Config()
+    config.return_reference_as_view("B", "b")
+    with cython_extension_from("complexfield.hpp",
+                               modulename="complexfieldview", config=config):
+        from complexfieldview import B
+        b = B()
+        b.b.a = 5
+        assert_equal(b.b.a, 5)
+        field = b.b
+        field.a = 6
+        assert_equal(b.b.a, 6)
+        del b
+        assert_equal(field.a, 6)
+
+
+def test_vector_of_struct_as_structured_array():
+    config = Config()
+    config.return_vector_as_array("makeRecords")
+    with cython_extension_from("structarray.hpp", config=config):
+        from structarray import (Record, Record_dtype, make_records,
+                                 sum_of_active_weights)
+        records = make_records(5)
+        assert_equal(records.dtype, Record_dtype)
+        assert_array_equal(records["id"], np.arange(5))
+        assert_array_equal(records["weight"], 0.5 * np.arange(5))
+        assert_equal(sum_of_active_weights(records), 3.0)
+        assert_equal(sum_of_active_weights(records[1::2]), 0.0)
+        record = Record()
+        record.set(1, 2.0, True)
+        assert_equal(sum_of_active_weights([record, record]), 4.0)
+
+
+def test_positional_only_arguments():
+    config = Config()
+    config.positional_only("add")
+    config.positional_only("Accumulator::add")
+    with cython_extension_from("positionalonly.hpp", config=config):
+        from positionalonly import Accumulator, add
+        assert_equal(add(1, 2), 3)
+        assert_raises(TypeError, add, a=1, b=2)
+        acc = Accumulator(start=1.0)
+        acc.add(2.0)
+        assert_raises(TypeError, acc.add, value=3.0)
+        assert_equal(acc.get(), 3.0)
+
+
+def test_cimportable_module():
+    config = Config()
+    config.cimportable = True
+    config.final_class("Counter")
+    config.inline_method("Counter", "get")
+    with cython_extension_from("cimportable.hpp", config=config):
+        from cimportable import Counter, twice
+        with open("cimportable.pxd", "r") as f:
+            declarations = f.read()
+        assert_in("cpdef twice(int value)", declarations)
+        assert_in("    cdef cpp.Counter * thisptr", declarations)
+        assert_in("    cpdef merge(Counter self, Counter other)",
+                  declarations)
+        assert_in("    cdef _get_impl(Counter self)", declarations)
+        c = Counter()
+        c.add(twice(2))
+        d = Counter()
+        d.add(1)
+        c.merge(d)
+        assert_equal(c.get(), 5)
+
+        # another Cython module cimports the wrapper classes and functions
+        user_code = lines(
+            "cimport cimportable",
+            "",
+            "def count(cimportable.Counter counter, int n):",
+            "    cdef int i",
+            "    for i in range(n):",
+            "        counter.add(cimportable.twice(1))",
+            "    return counter._get_impl(), counter.thisptr.get()")
+        setup = render("setup", module="cimportuser", filenames=[],
+                       sourcedir=".", incdirs=[], compiler_flags=["-O0"],
+                       library_dirs=[], libraries=[])
+        user_files = ["cimportuser.pyx", "cimportuser.cpp",
+                      "setup_cimportuser.py"]
+        write_files({"cimportuser.pyx": user_code,
+                     "setup_cimportuser.py": setup})
+        try:
+            run_setup("setup_cimportuser.py")
+            from cimportuser import count
+            assert_equal(count(c, 3), (11, 11))
+        finally:
+            remove_files(user_files)
+
+
+def test_iterable_classes():
+    config = Config()
+    config.register_iterator("Countdown", "int")
+    with cython_extension_from("iterable.hpp", config=config):
+        from iterable import Countdown, Point, Polygon, Samples
+        assert_equal(list(Samples()), [1.0, 2.0, 3.0])
+        polygon = Polygon()
+        for x in [1.0, 2.0]:
+            point = Point()
+            point.set_x(x)
+            polygon.add(point)
+        points = iter(polygon)
+        del polygon
+        assert_equal([point.get_x() for point in points], [1.0, 2.0])
+        assert_equal(list(Countdown(3)), [3, 2, 1])
+        assert_in("undefined behaviour", Samples.__doc__)
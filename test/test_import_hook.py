@@ -1,26 +1,118 @@
+import os
 import sys
-from pywrap.import_hook import CppFinder
-from pywrap.testing import PREFIX
-from pywrap.utils import remove_files
-from nose.tools import assert_equal, assert_raises
+import shutil
+import tempfile
+import threading
+import subprocess
+from pywrap.import_hook import (CppFinder, build_lock, dependencies, is_stale,
+                                _dependency_hashes, _write_dependencies)
+from pywrap.testing import PREFIX, full_paths
+from nose.tools import (assert_equal, assert_raises, assert_true,
+                        assert_false, assert_not_equal, assert_in)
 
 
 def test_import_hook_missing_header():
-    del sys.meta_path[:]
-    sys.meta_path.append(CppFinder(import_path=PREFIX))
+    finder = CppFinder(import_path=PREFIX)
+    sys.meta_path.insert(0, finder)
     try:
         assert_raises(ImportError, __import__, "missing")
     finally:
-        del sys.meta_path[:]
+        sys.meta_path.remove(finder)
 
 
 def test_import_hook():
-    del sys.meta_path[:]
-    sys.meta_path.append(CppFinder(import_path=PREFIX))
+    cache_dir = tempfile.mkdtemp()
+    finder = CppFinder(import_path=PREFIX, cache_dir=cache_dir)
+    sys.meta_path.insert(0, finder)
     try:
         import doubleindoubleout
         a = doubleindoubleout.A()
         assert_equal(a.plus2(2.0), 4.0)
+        assert_true(doubleindoubleout.__file__.startswith(cache_dir))
+        assert_false(any(f.startswith("doubleindoubleout")
+                         for f in os.listdir(".")))
     finally:
-        remove_files(["doubleindoubleout.so"])
-        del sys.meta_path[:]
+        sys.meta_path.remove(finder)
+        sys.modules.pop("doubleindoubleout", None)
+        shutil.rmtree(cache_dir)
+
+
+def test_lazy_import_hook():
+    cache_dir = tempfile.mkdtemp()
+    finder = CppFinder(import_path=PREFIX, cache_dir=cache_dir, lazy=True)
+    sys.meta_path.insert(0, finder)
+    try:
+        import boolinboolout
+        assert_equal(os.listdir(cache_dir), [])
+        a = boolinboolout.A()
+        assert_equal(a.neg(False), True)
+        assert_true(boolinboolout.__file__.startswith(cache_dir))
+    finally:
+        sys.meta_path.remove(finder)
+        sys.modules.pop("boolinboolout", None)
+        shutil.rmtree(cache_dir)
+
+
+def test_lazy_import_hook_with_threads():
+    cache_dir = tempfile.mkdtemp()
+    finder = CppFinder(import_path=PREFIX, cache_dir=cache_dir, lazy=True)
+    sys.meta_path.insert(0, finder)
+    try:
+        import doubleindoubleout
+        results = []
+        threads = [threading.Thread(
+            target=lambda: results.append(doubleindoubleout.A().plus2(1.0)))
+            for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert_equal(results, [3.0] * 4)
+    finally:
+        sys.meta_path.remove(finder)
+        sys.modules.pop("doubleindoubleout", None)
+        shutil.rmtree(cache_dir)
+
+def test_dependencies():
+    deps = dependencies(full_paths("deppart1.hpp")[0])
+    assert_equal(deps, full_paths(["deppart1.hpp", "deppart2.hpp"]))
+
+
+def test_modified_dependency_makes_entry_stale():
+    cache_dir = tempfile.mkdtemp()
+    try:
+        header = os.path.join(cache_dir, "a.hpp")
+        include = os.path.join(cache_dir, "b.hpp")
+        with open(header, "w") as f:
+            f.write("#include \"b.hpp\"\n")
+        with open(include, "w") as f:
+            f.write("int b();\n")
+        finder = CppFinder(import_path=cache_dir, cache_dir=cache_dir)
+        entry = finder.cache_entry("a", header)
+        os.makedirs(entry)
+        _write_dependencies(entry, _dependency_hashes(header, cache_dir))
+        assert_false(is_stale(entry))
+
+        with open(include, "w") as f:
+            f.write("int c();\n")
+        assert_true(is_stale(entry))
+        assert_not_equal(entry, finder.cache_entry("a", header))
+    finally:
+        shutil.rmtree(cache_dir)
+
+
+def test_build_lock_timeout():
+    cache_dir = tempfile.mkdtemp()
+    lock_file = os.path.join(cache_dir, "entry.lock")
+    try:
+        with build_lock(lock_file, 1.0):
+            child = subprocess.Popen([
+                sys.executable, "-c",
+                "from pywrap.import_hook import build_lock\n"
+                "with build_lock(%r, 0.5): pass" % lock_file],
+                stderr=subprocess.PIPE)
+            _, stderr = child.communicate()
+        assert_not_equal(child.returncode, 0)
+        assert_in(b"Timeout", stderr)
+    finally:
+        shutil.rmtree(cache_dir)
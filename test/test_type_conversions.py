@@ -1,6 +1,10 @@
+from collections.abc import Mapping, Set
+import array
 import numpy as np
+from numpy.testing import assert_array_equal
 from pywrap.testing import cython_extension_from
-from nose.tools import assert_equal, assert_raises
+from pywrap.defaultconfig import Config
+from nose.tools import assert_equal, assert_raises, assert_false, assert_true
 
 
 def test_bool_in_bool_out():
@@ -34,6 +38,41 @@ def test_map():
         assert_equal(lookup(m), 0)
 
 
+def test_container_views():
+    config = Config()
+    config.containers_as_views = True
+    with cython_extension_from("mapview.hpp", config=config):
+        from mapview import squares, names, sum_values
+        m = squares(4)
+        assert_true(isinstance(m, Mapping))
+        assert_equal(len(m), 4)
+        assert_equal(m[3], 9.0)
+        assert_raises(KeyError, lambda: m[4])
+        assert_true(2 in m)
+        assert_false("a" in m)
+        assert_equal(list(m), [0, 1, 2, 3])
+        assert_equal(dict(m.items()), {0: 0.0, 1: 1.0, 2: 4.0, 3: 9.0})
+        s = names()
+        assert_true(isinstance(s, Set))
+        assert_equal(list(s), [b"a", b"b"])
+        assert_true(s == {b"a", b"b"})
+        assert_true(s <= {b"a", b"b"} and s < {b"a", b"b", b"c"})
+        assert_true(s >= {b"a"} and s > {b"a"} and not s > s)
+        assert_equal(s & {b"a", b"c"}, {b"a"})
+        assert_equal({b"a", b"c"} & s, {b"a"})
+        assert_equal(s | {b"c"}, {b"a", b"b", b"c"})
+        assert_equal(s - {b"a"}, {b"b"})
+        assert_equal({b"a", b"c"} - s, {b"c"})
+        assert_equal(s ^ {b"a", b"c"}, {b"b", b"c"})
+        assert_true(s.isdisjoint([b"c"]))
+        assert_false(s.isdisjoint([b"b"]))
+        assert_true(2.0 in m)
+        assert_false(2.5 in m)
+        assert_raises(KeyError, lambda: m[2.5])
+        assert_equal(sum_values({1: 2.0, 3: 4.5}), 6.5)
+        assert_equal(sum_values(m), 14.0)
+
+
 def test_vector():
     with cython_extension_from("vector.hpp"):
         from vector import A
@@ -43,6 +82,17 @@ def test_vector():
         assert_equal(n, 14.0)
 
 
+def test_vector_from_buffer():
+    with cython_extension_from("vectorinput.hpp"):
+        from vectorinput import sum, length
+        assert_equal(sum(np.arange(4.0)), 6.0)
+        assert_equal(sum(np.arange(8.0)[::2]), 12.0)
+        assert_equal(sum(np.arange(4)), 6.0)
+        assert_equal(sum(np.empty(0)), 0.0)
+        assert_equal(sum([1.0, 2.0]), 3.0)
+        assert_equal(length(b"abc"), 3)
+
+
 def test_string_in_string_out():
     with cython_extension_from("stringinstringout.hpp"):
         from stringinstringout import A
@@ -89,17 +139,72 @@ def test_cstring():
         assert_equal(helloworld(), "hello world")
 
 
+def test_string_policies():
+    config = Config()
+    config.string_policy = "utf-8"
+    config.set_string_policy("repeat", "buffer")
+    with cython_extension_from("stringpolicy.hpp", config=config):
+        from stringpolicy import (repeat, count_zeros, c_length, greeting,
+                                  to_upper)
+        result = repeat(b"ab", 2)
+        assert_true(isinstance(result, memoryview))
+        assert_true(result.readonly)
+        assert_equal(result.tobytes(), b"abab")
+        assert_equal(bytes(repeat(bytearray(b"x"), 3)), b"xxx")
+        assert_equal(count_zeros(b"a\x00b\x00"), 2)
+        assert_equal(count_zeros(memoryview(b"\x00\x00")), 2)
+        assert_equal(count_zeros(array.array("i", [0, 1])), 7)
+        assert_equal(count_zeros("\x00"), 1)
+        assert_raises(TypeError, count_zeros, None)
+        assert_equal(c_length("h\u00e9llo"), 6)
+        assert_equal(greeting(), "h\u00e9llo")
+        data = bytearray(b"abc")
+        to_upper(data)
+        assert_equal(data, b"ABC")
+        assert_raises((BufferError, ValueError), to_upper, b"abc")
+        assert_raises(TypeError, to_upper, "abc")
+
+
 def test_fixed_length_array():
-    with cython_extension_from("fixedarray.hpp"):
+    config = Config()
+    config.string_policy = "utf-8"
+    with cython_extension_from("fixedarray.hpp", config=config):
         from fixedarray import to_string
         assert_equal(to_string([1, 2, 3, 4, 5]), "[1, 2, 3, 4, 5]")
         assert_raises(ValueError, to_string, [1, 2, 3, 4])
         assert_raises(TypeError, to_string, [1, 2, 3, 4, "a"])
+        assert_equal(to_string(np.arange(1.0, 6.0)), "[1, 2, 3, 4, 5]")
+        assert_equal(to_string(np.arange(1.0, 11.0)[::2]), "[1, 3, 5, 7, 9]")
+        assert_equal(to_string(np.arange(5)), "[0, 1, 2, 3, 4]")
+
+
+def test_std_array():
+    with cython_extension_from("stdarray.hpp"):
+        from stdarray import cross, trace, Transform
+        assert_equal(cross([1, 0, 0], np.array([0.0, 1.0, 0.0])),
+                     (0.0, 0.0, 1.0))
+        assert_equal(trace(np.eye(4)), 4.0)
+        assert_equal(trace(np.eye(4, dtype=int)), 4.0)
+        t = Transform()
+        t.matrix = np.eye(4)
+        assert_equal(t.matrix, tuple(np.eye(4).ravel()))
+
+
+def test_fixed_size_arrays_as_ndarrays():
+    config = Config()
+    config.fixed_size_arrays_as_ndarrays = True
+    with cython_extension_from("stdarray.hpp", modulename="stdarrayndarray",
+                               config=config):
+        from stdarrayndarray import cross
+        c = cross([1, 0, 0], [0, 1, 0])
+        assert_equal(c.dtype, np.float64)
+        assert_array_equal(c, [0.0, 0.0, 1.0])
 
 
 def test_missing_default_ctor():
-    with cython_extension_from("missingdefaultctor.hpp", hide_errors=True):
-        assert_raises(ImportError, __import__, "missingdefaultctor")
+    with cython_extension_from("missingdefaultctor.hpp"):
+        from missingdefaultctor import MyClassA, factory
+        assert_true(isinstance(factory(), MyClassA))
 
 
 def test_missing_assignment():
@@ -127,3 +232,77 @@ def test_exceptions():
         assert_raises(ArithmeticError, throw_range_error)
         assert_raises(ArithmeticError, throw_underflow_error)
         assert_raises(RuntimeError, throw_other)
+
+
+def test_arrays():
+    config = Config()
+    config.add_array_length_name("n")
+    config.add_array_length_name("size")
+    config.add_array_length_name("len")
+    with cython_extension_from("arrays.hpp", config=config):
+        from arrays import sum_floats, sum_ints, increment, first
+        assert_equal(sum_floats(np.ones(4, dtype=np.float32)), 4.0)
+        assert_equal(sum_floats(np.ones(0, dtype=np.float32)), 0.0)
+        assert_raises(ValueError, sum_floats, np.ones(4))
+        assert_raises(ValueError, sum_floats,
+                      np.ones((4, 2), dtype=np.float32)[:, 0])
+        assert_raises(TypeError, sum_floats, None)
+        readonly = np.ones(4, dtype=np.float32)
+        readonly.flags.writeable = False
+        assert_equal(sum_floats(readonly), 4.0)
+        assert_equal(sum_ints(array.array("i", [1, 2, 3])), 6)
+        b = bytearray(b"abc")
+        increment(b)
+        assert_equal(b, bytearray(b"bcd"))
+        assert_raises((BufferError, ValueError), increment, b"abc")
+        a = np.zeros(3, dtype=np.uint8)
+        increment(memoryview(a))
+        assert_array_equal(a, np.ones(3))
+        assert_equal(first(5.0, 0), 5.0)
+
+
+def test_matrix():
+    config = Config()
+    config.register_matrix_argument("rowMajorElement", "data")
+    config.register_matrix_argument("colMajorElement", "data", order="F")
+    config.register_matrix_argument("stridedElement", "data",
+                                    leading_dimension=True)
+    config.register_matrix_argument("scale", "data")
+    with cython_extension_from("matrix.hpp", config=config):
+        import matrix
+        a = np.arange(12.0).reshape(3, 4)
+        assert_equal(matrix.row_major_element(a, 1, 2), a[1, 2])
+        assert_equal(matrix.n_matrix_copies, 0)
+        assert_equal(
+            matrix.col_major_element(np.asfortranarray(a), 1, 2), a[1, 2])
+        assert_equal(matrix.n_matrix_copies, 0)
+        assert_equal(matrix.strided_element(a[:, 1:3], 1, 1), a[1, 2])
+        assert_equal(matrix.n_matrix_copies, 0)
+        assert_equal(matrix.col_major_element(a, 1, 2), a[1, 2])
+        assert_equal(matrix.n_matrix_copies, 1)
+        b = np.ones((2, 3), dtype=np.float32)
+        matrix.scale(b, 2.0)
+        assert_array_equal(b, 2.0 * np.ones((2, 3)))
+        assert_raises(ValueError, matrix.scale, b.T, 2.0)
+        assert_array_equal(b, 2.0 * np.ones((2, 3)))
+        readonly = np.arange(12.0).reshape(3, 4)
+        readonly.flags.writeable = False
+        assert_equal(matrix.row_major_element(readonly, 1, 2), 6.0)
+
+
+def test_vector_returned_as_array():
+    config = Config()
+    config.return_vector_as_array("linspace")
+    config.return_vector_as_array("fill")
+    with cython_extension_from("vectorreturn.hpp", config=config):
+        from vectorreturn import linspace, fill, ones
+        a = linspace(0.0, 1.0, 5)
+        assert_array_equal(a, np.linspace(0.0, 1.0, 5))
+        assert_equal(a.dtype, np.float64)
+        assert_false(a.flags.owndata)
+        b = fill(3, 7)
+        assert_equal(b.dtype, np.int32)
+        b[0] = 1
+        assert_array_equal(b, [1, 7, 7])
+        assert_equal(fill(0, 7).shape, (0,))
+        assert_equal(ones(2), [1.0, 1.0])
@@ -0,0 +1,23 @@
+class Color
+{
+    int r, g, b;
+public:
+    Color() : r(0), g(0), b(0) {}
+    Color(int r, int g, int b) : r(r), g(g), b(b) {}
+
+    int sum() const
+    {
+        return r + g + b;
+    }
+
+    Color inverted() const
+    {
+        return Color(255 - r, 255 - g, 255 - b);
+    }
+};
+
+
+Color* newBlack()
+{
+    return new Color();
+}
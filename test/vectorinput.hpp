@@ -0,0 +1,16 @@
+#include <vector>
+#include <stdint.h>
+
+
+double sum(const std::vector<double>& values)
+{
+    double result = 0.0;
+    for(unsigned int i = 0; i < values.size(); i++)
+        result += values[i];
+    return result;
+}
+
+int length(std::vector<uint8_t> bytes)
+{
+    return bytes.size();
+}
@@ -0,0 +1,33 @@
+#include <cmath>
+#include <stdexcept>
+
+
+double hypotenuse(double a, double b)
+{
+    if(std::isnan(a) || std::isnan(b))
+        throw std::invalid_argument("NaN");
+    return std::sqrt(a * a + b * b);
+}
+
+
+class Polynomial
+{
+    double a, b, c;
+public:
+    Polynomial(double a, double b, double c)
+        : a(a), b(b), c(c)
+    {
+    }
+
+    double evaluate(double x)
+    {
+        if(std::isnan(x))
+            throw std::invalid_argument("x is NaN");
+        return (a * x + b) * x + c;
+    }
+
+    static float scale(float x, float factor)
+    {
+        return x * factor;
+    }
+};
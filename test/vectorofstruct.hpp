@@ -19,3 +19,14 @@ int sumOfActivatedEntries(const std::vector<MyStruct>& entries)
     }
     return sum;
 }
+
+std::vector<MyStruct> makeEntries(int n)
+{
+    std::vector<MyStruct> entries(n);
+    for(int i = 0; i < n; i++)
+    {
+        entries[i].value = i;
+        entries[i].active = i % 2 == 0;
+    }
+    return entries;
+}
@@ -0,0 +1,21 @@
+#include <vector>
+#include <stdint.h>
+
+
+std::vector<double> linspace(double start, double stop, int n)
+{
+    std::vector<double> result(n);
+    for(int i = 0; i < n; i++)
+        result[i] = start + (stop - start) * i / (n - 1);
+    return result;
+}
+
+std::vector<int32_t> fill(int n, int32_t value)
+{
+    return std::vector<int32_t>(n, value);
+}
+
+std::vector<double> ones(int n)
+{
+    return std::vector<double>(n, 1.0);
+}